@@ -0,0 +1,45 @@
+"""
+合批吞吐测试：同一批图片逐张 predict 与按 batch 合并 predict 的 images/sec 对比
+
+默认使用 CPU 推理，和 OCR_BATCH_SIZE 的效果一一对应。
+
+用法: uv run python bench/batching.py t1.jpg -n 32 -b 1 2 4 8
+      uv run python bench/batching.py t1.jpg -b 1 --cpu-threads 4   # CPU 调优参数对比
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ocr_engine import add_device_arguments, configure_from_args, create_ocr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PaddleOCR 合批吞吐测试")
+    parser.add_argument("image", nargs="?", default="t1.jpg", help="测试图片")
+    parser.add_argument("-n", "--images", type=int, default=32, help="每轮识别的图片数")
+    parser.add_argument("-b", "--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="要对比的 batch 大小 (默认: 1 2 4 8)")
+    add_device_arguments(parser)
+    parser.set_defaults(device="cpu")
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    ocr = create_ocr()
+    # 预热，排除首次推理的初始化开销
+    list(ocr.predict(args.image))
+
+    images = [args.image] * args.images
+    print(f"{'batch':>5} {'images/s':>9} {'ms/image':>9}")
+    for size in args.batch_sizes:
+        t0 = time.perf_counter()
+        for i in range(0, len(images), size):
+            list(ocr.predict(images[i:i + size]))
+        elapsed = time.perf_counter() - t0
+        print(f"{size:>5} {len(images) / elapsed:>9.2f} {elapsed / len(images) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+文本拼接微基准：/ocr 返回的 text 字段，旧实现（每加入一项都重新求行均值）vs 增量均值 + NumPy
+
+不需要模型，生成 n 个文字框的合成页面：单栏时每行一长串词，双栏时左右两栏行高错开，
+检查两种实现单栏输出一致，以及 columns=True 时双栏不交错。
+
+用法: uv run python bench/build_text.py -n 1000 5000 20000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ocr_engine import build_text
+from ocr_result import OCRResult
+
+
+def build_text_loop(items: list[dict]) -> str:
+    """旧实现：每加入一项都对整行重新求和算行均值，行越长越慢"""
+    if not items:
+        return ""
+
+    heights = [item["bbox"][3] - item["bbox"][1] for item in items]
+    line_thresh = sorted(heights)[len(heights) // 2] * 0.6
+
+    sorted_by_y = sorted(items, key=lambda it: it["center"][1])
+    lines = []
+    current_line = []
+    current_line_y = 0.0
+
+    for item in sorted_by_y:
+        cy = item["center"][1]
+        if not current_line:
+            current_line = [item]
+            current_line_y = cy
+        elif abs(cy - current_line_y) <= line_thresh:
+            current_line.append(item)
+            current_line_y = sum(it["center"][1] for it in current_line) / len(current_line)
+        else:
+            lines.append(current_line)
+            current_line = [item]
+            current_line_y = cy
+    if current_line:
+        lines.append(current_line)
+
+    text_lines = []
+    for line_items in lines:
+        line_items.sort(key=lambda it: it["bbox"][0])
+        parts = []
+        prev_bbox = None
+        for i, it in enumerate(line_items):
+            if i > 0 and prev_bbox is not None:
+                gap = it["bbox"][0] - prev_bbox[2]
+                prev_width = prev_bbox[2] - prev_bbox[0]
+                curr_width = it["bbox"][2] - it["bbox"][0]
+                avg_block_width = (prev_width + curr_width) / 2
+                if avg_block_width > 100:
+                    should_add_space = gap / avg_block_width > 0.2
+                else:
+                    should_add_space = gap > 30
+                if should_add_space:
+                    parts.append(" ")
+            parts.append(it["text"])
+            prev_bbox = it["bbox"]
+        text_lines.append("".join(parts))
+
+    return "\n".join(text_lines)
+
+
+def make_page(n: int, columns: int = 1, per_line: int = 200, seed: int = 0) -> OCRResult:
+    """生成 n 个文字框：columns 栏，每栏每行 per_line 个词，y 带 ±3px 抖动，按阅读顺序排好"""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    col = i % columns
+    row, pos = divmod(i // columns, per_line)
+    width = rng.integers(40, 66, n)
+    x1 = col * (per_line * 70 + 200) + pos * 70
+    y1 = row * 40 + col * 13 + rng.integers(-3, 4, n)
+    corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]])
+    polys = np.stack([x1, y1], axis=1)[:, None] + np.stack([width, np.full(n, 20)], axis=1)[:, None] * corners
+    texts = [f"c{c}r{r}w{p}" for c, r, p in zip(col.tolist(), row.tolist(), pos.tolist())]
+    return OCRResult(texts, polys.astype(np.int32), rng.random(n)).sorted()
+
+
+def timeit(fn, repeat: int) -> float:
+    """返回 repeat 次中最快一次的耗时 ms"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="text 字段拼接微基准")
+    parser.add_argument("-n", "--boxes", type=int, nargs="+", default=[1000, 5000, 20000],
+                        help="每页文字框数量 (默认: 1000 5000 20000)")
+    parser.add_argument("--per-line", type=int, default=200, help="每行的词数，越大旧实现越慢 (默认: 200)")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="每项重复次数，取最快一次")
+    args = parser.parse_args()
+
+    print(f"{'boxes':>6} {'loop ms':>9} {'numpy ms':>9} {'speedup':>8} {'columns ms':>11}")
+    for n in args.boxes:
+        page = make_page(n, per_line=args.per_line)
+        items = page.to_items()
+        assert build_text(page) == build_text_loop(items)
+
+        two = make_page(n, columns=2, per_line=args.per_line)
+        for k, block in enumerate(build_text(two, columns=True).split("\n\n")):
+            assert all(word.startswith(f"c{k}") for word in block.split()), "columns interleaved"
+
+        t_loop = timeit(lambda: build_text_loop(items), args.repeat)
+        t_vec = timeit(lambda: build_text(page), args.repeat)
+        t_col = timeit(lambda: build_text(two, columns=True), args.repeat)
+        print(f"{n:>6} {t_loop:>9.2f} {t_vec:>9.2f} {t_loop / t_vec:>7.1f}x {t_col:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+CLI 单次调用延迟：冷启动（本地加载模型）vs 热路径（连接已运行的 OCR Server）
+
+每次都新起一个 `python ocr.py` 进程，和 click.sh / ocr.sh 每次点击的开销一致。
+测热路径前需要先启动 server，例如: uv run python ocr_server.py --uds /tmp/ocr-server.sock
+
+server 默认开启结果缓存（OCR_CACHE_ENTRIES=128），同一张图片只有第一次真正识别。
+每次调用前把图片复制一份并在末尾追加递增序号（解码器忽略图片结束标记之后的字节），
+内容各不相同、不会命中缓存，测的是真实的识别耗时。
+
+用法: uv run python bench/cli_latency.py t1.jpg -t 登录 -n 5
+"""
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_serial = itertools.count()
+
+
+def run(image: str, target: str | None, mode: str, n: int) -> list[float]:
+    env = dict(os.environ, OCR_CLIENT_MODE=mode, PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK="True")
+    data = Path(image).read_bytes()
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(n):
+            # 每次调用一张内容不同的图片，避开 server 的结果缓存（不计入耗时）
+            i = next(_serial)
+            path = Path(tmp) / f"{i}{Path(image).suffix}"
+            path.write_bytes(data + i.to_bytes(8, "little"))
+            cmd = [sys.executable, str(ROOT / "ocr.py"), str(path)]
+            if target:
+                cmd += ["-t", target]
+            t0 = time.perf_counter()
+            subprocess.run(cmd, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 冷启动 vs OCR Server 延迟对比")
+    parser.add_argument("image", nargs="?", default="t1.jpg", help="测试图片")
+    parser.add_argument("-t", "--target", help="查找的文字（模拟一次点击）")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="每种模式的调用次数")
+    args = parser.parse_args()
+
+    print("每次调用的图片内容不同，不命中结果缓存")
+    print(f"{'mode':>7} {'min':>8} {'median':>8} {'max':>8}")
+    for label, mode in (("cold", "local"), ("warm", "server")):
+        t = sorted(run(args.image, args.target, mode, args.runs))
+        print(f"{label:>7} {t[0]:>7.0f}ms {t[len(t) // 2]:>7.0f}ms {t[-1]:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+OCR Server 并发延迟测试
+
+分别以 1 / 4 / 16 个并发客户端压测 /ocr，输出 p50/p90/p99 延迟、503 次数，
+并在压测期间持续探测 /health，确认推理不阻塞事件循环。
+
+server 默认开启结果缓存（OCR_CACHE_ENTRIES=128），同一张图片只有第一次真正识别。
+每个请求在图片末尾追加一个递增序号（解码器忽略图片结束标记之后的字节），内容不同、不会命中缓存，
+测的是识别本身的延迟。
+
+用法: uv run python bench/latency.py t1.jpg --url http://127.0.0.1:8089 -n 64
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import time
+
+import httpx
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+async def _probe_health(client: httpx.AsyncClient, url: str, stop: asyncio.Event, out: list[float]):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await client.get(f"{url}/health")
+        out.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.05)
+
+
+_serial = itertools.count()
+
+
+def unique_payload(image: bytes) -> dict:
+    """图片末尾追加递增序号，每次得到不同的请求体，避开 server 的结果缓存"""
+    data = image + next(_serial).to_bytes(8, "little")
+    return {"image": base64.b64encode(data).decode()}
+
+
+async def run_level(url: str, image: bytes, concurrency: int, total: int) -> dict:
+    latencies = []
+    health = []
+    rejected = 0
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        async def worker():
+            nonlocal rejected
+            for _ in counter:
+                payload = unique_payload(image)
+                t0 = time.perf_counter()
+                resp = await client.post(f"{url}/ocr", json=payload)
+                elapsed = (time.perf_counter() - t0) * 1000
+                if resp.status_code == 503:
+                    rejected += 1
+                    await asyncio.sleep(float(resp.headers.get("Retry-After", "1")))
+                    continue
+                latencies.append(elapsed)
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_health(client, url, stop, health))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+        stop.set()
+        await probe
+
+    return {
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "rejected": rejected,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "health_p99": percentile(health, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR Server 并发延迟测试")
+    parser.add_argument("image", nargs="?", default="t1.jpg", help="测试图片")
+    parser.add_argument("--url", default="http://127.0.0.1:8089", help="OCR Server 地址")
+    parser.add_argument("-n", "--requests", type=int, default=32, help="每个并发级别的请求数")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="并发客户端数 (默认: 1 4 16)")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    print(f"{'conc':>4} {'ok':>5} {'503':>5} {'rps':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'health p99':>11}")
+    for c in args.concurrency:
+        r = asyncio.run(run_level(args.url, image, c, args.requests))
+        print(f"{r['concurrency']:>4} {r['ok']:>5} {r['rejected']:>5} {r['rps']:>7.2f} "
+              f"{r['p50']:>7.0f}ms {r['p90']:>7.0f}ms {r['p99']:>7.0f}ms {r['health_p99']:>9.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
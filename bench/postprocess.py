@@ -0,0 +1,114 @@
+"""
+后处理微基准：predict 结果 -> items 的转换耗时，逐个多边形循环（旧实现）vs NumPy 整体计算，
+以及 list[dict] 与列式 OCRResult 常驻内存的对比
+
+不需要模型，按页面上的文字框数量生成随机四边形，只测后处理本身。
+
+用法: uv run python bench/postprocess.py -n 100 1000 5000
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ocr_cache import compact_result
+
+
+def items_from_raw_loop(raw: dict) -> list[dict]:
+    """旧实现：每个多边形在 Python 里逐点 int() 和 sum/min/max（box / center 同样输出为 list，便于比对）"""
+    items = []
+    for box, txt, score in zip(raw["rec_polys"], raw["rec_texts"], raw["rec_scores"]):
+        int_box = [[int(p[0]), int(p[1])] for p in box]
+        cx = sum(p[0] for p in int_box) // 4
+        cy = sum(p[1] for p in int_box) // 4
+        x1 = min(p[0] for p in int_box)
+        y1 = min(p[1] for p in int_box)
+        x2 = max(p[0] for p in int_box)
+        y2 = max(p[1] for p in int_box)
+        items.append({
+            "text": txt,
+            "box": int_box,
+            "bbox": [x1, y1, x2, y2],
+            "center": [cx, cy],
+            "score": float(score),
+        })
+    return items
+
+
+def make_result(n: int, seed: int = 0) -> dict:
+    """生成 n 个文字框的 predict 结果，格式与 PaddleOCR 一致 (rec_polys 为 int16 数组)"""
+    rng = np.random.default_rng(seed)
+    xy = rng.integers(0, 1800, (n, 1, 2))
+    wh = rng.integers(20, 120, (n, 1, 2))
+    corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]])
+    polys = (xy + wh * corners).astype(np.int16)
+    return {
+        "rec_polys": list(polys),
+        "rec_texts": [f"text{i}" for i in range(n)],
+        "rec_scores": rng.random(n).astype(np.float32),
+    }
+
+
+def allocated(fn) -> int:
+    """fn() 返回的对象常驻的字节数"""
+    tracemalloc.start()
+    obj = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def timeit(fn, repeat: int) -> float:
+    """返回 repeat 次中最快一次的耗时 ms"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 后处理微基准")
+    parser.add_argument("-n", "--boxes", type=int, nargs="+", default=[100, 1000, 5000],
+                        help="每页文字框数量 (默认: 100 1000 5000)")
+    parser.add_argument("-r", "--repeat", type=int, default=20, help="每项重复次数，取最快一次")
+    args = parser.parse_args()
+
+    print(f"{'boxes':>6} {'step':>8} {'loop ms':>9} {'numpy ms':>9} {'speedup':>8}")
+    for n in args.boxes:
+        res = make_result(n)
+        result = compact_result(res, (1920, 1080))
+        raw = result.to_raw()
+        assert result.to_items() == items_from_raw_loop(raw)
+
+        def compact_loop():
+            return {
+                "rec_texts": list(res["rec_texts"]),
+                "rec_polys": [[[int(p[0]), int(p[1])] for p in box] for box in res["rec_polys"]],
+                "rec_scores": [float(s) for s in res["rec_scores"]],
+            }
+
+        for step, loop, vec in (
+            ("compact", compact_loop, lambda: compact_result(res, (1920, 1080))),
+            ("items", lambda: items_from_raw_loop(raw), result.to_items),
+        ):
+            t_loop, t_vec = timeit(loop, args.repeat), timeit(vec, args.repeat)
+            print(f"{n:>6} {step:>8} {t_loop:>9.2f} {t_vec:>9.2f} {t_loop / t_vec:>7.1f}x")
+
+    print(f"\n{'boxes':>6} {'list[dict] KB':>14} {'OCRResult KB':>13}")
+    for n in args.boxes:
+        res = make_result(n)
+        dicts = allocated(lambda: items_from_raw_loop(compact_result(res, (1920, 1080)).to_raw()))
+        columnar = allocated(lambda: compact_result(res, (1920, 1080)))
+        print(f"{n:>6} {dicts / 1024:>14.0f} {columnar / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+容量规划：同样的 CPU 核数下，进程数 × 每进程推理线程数的不同组合对吞吐和延迟的影响
+
+每个组合起一个多进程 server（ocr_server.py --processes P，每个 worker 一个模型实例、
+OCR_CPU_THREADS=T，默认绑核），用合成截图压测 /ocr/upload，输出吞吐 / p50 / p99 和每核吞吐，
+报告写到 bench/results/sizing-<commit>.json。结论的读法见 README 的「多进程部署」。
+
+用法:
+    uv run python bench/sizing.py                       # 按本机 CPU 数自动生成组合 (1xN, 2xN/2, ...)
+    uv run python bench/sizing.py --configs 1x8 2x4 4x2 8x1 -c 1 8 16 -n 64
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from suite import ROOT, bench_server, git_commit, metadata
+from synth import make_screenshot, parse_resolution
+
+import ocr_engine
+import ocr_workers
+
+
+def default_configs(cores: int) -> list[tuple[int, int]]:
+    """P x T = cores 的全部组合，P 取 1, 2, 4, ... 直到 cores"""
+    configs = []
+    p = 1
+    while p <= cores:
+        configs.append((p, cores // p))
+        p *= 2
+    return configs
+
+
+def parse_config(text: str) -> tuple[int, int]:
+    p, t = text.lower().split("x")
+    return int(p), int(t)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程部署容量规划：进程数 x 线程数")
+    parser.add_argument("--configs", nargs="+", type=parse_config, metavar="PxT",
+                        help="要测的组合，进程数x每进程线程数 (默认按本机 CPU 数自动生成)")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+",
+                        help="并发级别 (默认: 1 和 2 倍最大进程数)")
+    parser.add_argument("-n", "--requests", type=int, default=48, help="每个并发级别的请求数 (默认: 48)")
+    parser.add_argument("--resolution", default="1920x1080", help="压测截图分辨率 (默认: 1920x1080)")
+    parser.add_argument("--density", default="dense", help="压测截图密度 (默认: dense)")
+    parser.add_argument("--no-pin", action="store_true", help="不绑核")
+    parser.add_argument("-o", "--output", help="报告路径 (默认: bench/results/sizing-<commit>.json)")
+    ocr_engine.add_device_arguments(parser)
+    parser.set_defaults(device="cpu")
+    args = parser.parse_args()
+    ocr_engine.configure_from_args(args)
+
+    cores = len(ocr_workers.available_cpus())
+    configs = args.configs or default_configs(cores)
+    levels = args.concurrency or sorted({1, 2 * max(p for p, _ in configs)})
+    data, _ = make_screenshot(*parse_resolution(args.resolution), args.density)
+    case = f"{args.resolution}-{args.density}"
+
+    results = []
+    print(f"{cores} cpus, image {case}", file=sys.stderr)
+    print(f"{'config':>7} {'conc':>5} {'rps':>7} {'rps/core':>9} {'p50':>8} {'p99':>8} {'503':>5}")
+    for p, t in configs:
+        env = {"OCR_CPU_THREADS": str(t), "OMP_NUM_THREADS": str(t), "OCR_PIN_CPUS": "0" if args.no_pin else "1"}
+        for record in bench_server(case, data, levels, args.requests, workers=1, batch_size=1, processes=p, env=env):
+            used = min(cores, p * t)
+            record.update(bench="sizing", case=f"{p}x{t}/c{record['concurrency']}", processes=p, threads=t,
+                          rps_per_core=record["rps"] / used)
+            results.append(record)
+            print(f"{p}x{t:<5} {record['concurrency']:>5} {record['rps']:>7.2f} {record['rps_per_core']:>9.3f} "
+                  f"{record['p50_ms']:>7.0f}ms {record['p99_ms']:>7.0f}ms {record['rejected']:>5}")
+
+    args.configs = [f"{p}x{t}" for p, t in configs]
+    report = {"meta": {**metadata(args), "cores": cores}, "results": results}
+    output = Path(args.output) if args.output else ROOT / "bench" / "results" / f"sizing-{git_commit()}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"report: {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+基准测试套件：在合成截图上跑一整套测试，结果写入 JSON 报告，可以在不同提交之间对比
+
+测试项（默认 CPU 推理，不使用结果缓存）:
+    cold_start  新进程 import → 加载模型 → 第一次识别，各段耗时
+    recognize   recognize() 延迟（各分辨率 × 密度），以及 predict / decode 等阶段均值
+    match       find_text_item 匹配耗时：命中 / 未命中 / fuzzy，首次查询（含建索引）和复用索引
+    build_text  text 字段拼接耗时，单栏和 columns=True
+    server      本地起一个 ocr_server（Unix socket），不同并发下 /ocr/upload 的吞吐和 p50/p90/p99
+
+用法:
+    uv run python bench/suite.py                                  # 完整测试，报告写到 bench/results/<commit>.json
+    uv run python bench/suite.py --quick                          # 小规模冒烟
+    uv run python bench/suite.py --compare bench/results/abc123.json            # 跑完和基线对比
+    uv run python bench/suite.py --compare bench/results/abc123.json new.json   # 只对比两份报告
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# 测的是识别本身，关掉结果缓存；本进程只用本地模型
+os.environ.setdefault("OCR_CACHE_ENTRIES", "0")
+os.environ["OCR_CLIENT_MODE"] = "local"
+
+import httpx
+
+import ocr
+import ocr_engine
+from latency import percentile
+from synth import DENSITIES, make_screenshot, parse_resolution
+
+# 报告对比时关注的字段：越小越好的耗时和越大越好的吞吐
+LOWER_IS_BETTER = ("_ms", "_us")
+HIGHER_IS_BETTER = ("rps",)
+
+COLD_START_CODE = """
+import json, sys, time
+t0 = time.perf_counter()
+import ocr_engine
+t1 = time.perf_counter()
+ocr_engine.get_pool().fill()
+t2 = time.perf_counter()
+with ocr_engine.collect_timings() as timings:
+    ocr_engine.recognize(sys.argv[1])
+t3 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "load_ms": (t2 - t1) * 1000,
+                  "first_recognize_ms": (t3 - t2) * 1000, "stages": timings}))
+"""
+
+
+def timeit_us(fn, repeat: int) -> list[float]:
+    """每次调用的耗时 us"""
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1e6)
+    return out
+
+
+def summarize(values: list[float], unit: str) -> dict:
+    return {
+        f"min_{unit}": min(values),
+        f"median_{unit}": statistics.median(values),
+        f"p90_{unit}": percentile(values, 90),
+    }
+
+
+def engine_env() -> dict:
+    """把当前的推理设备配置传给子进程（冷启动、server）"""
+    return dict(os.environ, **ocr_engine.device_env(), PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK="True")
+
+
+# ------------------------------------------------------------ 测试项
+
+def bench_cold_start(image: Path, runs: int) -> list[dict]:
+    records = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", COLD_START_CODE, str(image)],
+            env=engine_env(), cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        record = json.loads(proc.stdout.strip().splitlines()[-1])
+        record["process_ms"] = (time.perf_counter() - t0) * 1000
+        records.append({"bench": "cold_start", "case": f"run{i}", **record})
+    return records
+
+
+def bench_recognize(cases: dict, repeat: int) -> tuple[list[dict], dict]:
+    """返回 (记录, {case: 识别结果})，结果给 match / build_text 复用"""
+    records = []
+    results = {}
+    for case, (data, words) in cases.items():
+        results[case] = ocr.recognize(data)  # 预热，也排除第一次 predict 的初始化开销
+        latencies = []
+        stages = {}
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            with ocr_engine.collect_timings(stages):
+                ocr.recognize(data)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        records.append({
+            "bench": "recognize",
+            "case": case,
+            "words": len(words),
+            "boxes": len(results[case]),
+            **summarize(latencies, "ms"),
+            "stages": {stage: ms / repeat for stage, ms in stages.items()},  # 每次的平均 ms
+        })
+    return records, results
+
+
+def bench_match(results: dict, cases: dict, repeat: int) -> list[dict]:
+    records = []
+    for case, result in results.items():
+        words = cases[case][1]
+        present = words[len(words) // 2]["text"] if words else "Login"
+        queries = {
+            "hit": (present, 0.0),
+            "miss": ("不存在的按钮", 0.0),
+            "fuzzy": (present[:-1] + "x" if len(present) > 2 else present, 0.3),
+        }
+        for kind, (target, fuzzy) in queries.items():
+            # 每次用新的 OCRResult，首次查询包含建索引的开销
+            copies = [result.take(slice(None)) for _ in range(repeat)]
+            it = iter(copies)
+            cold = timeit_us(lambda: ocr.find_text_item(None, target, items=next(it), fuzzy=fuzzy), repeat)
+            warm = timeit_us(lambda: ocr.find_text_item(None, target, items=copies[0], fuzzy=fuzzy), repeat)
+            records.append({
+                "bench": "match",
+                "case": f"{case}/{kind}",
+                "boxes": len(result),
+                "first_median_us": statistics.median(cold),
+                "reuse_median_us": statistics.median(warm),
+            })
+    return records
+
+
+def bench_build_text(results: dict, repeat: int) -> list[dict]:
+    records = []
+    for case, result in results.items():
+        for columns in (False, True):
+            records.append({
+                "bench": "build_text",
+                "case": f"{case}/{'columns' if columns else 'lines'}",
+                "boxes": len(result),
+                **summarize(timeit_us(lambda: ocr_engine.build_text(result, columns=columns), repeat), "us"),
+            })
+    return records
+
+
+async def _load(client: httpx.AsyncClient, data: bytes, concurrency: int, total: int) -> dict:
+    latencies = []
+    rejected = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal rejected
+        for _ in counter:
+            t0 = time.perf_counter()
+            resp = await client.post("/ocr/upload", content=data, params={"text": "false"})
+            if resp.status_code == 503:
+                rejected += 1
+                continue
+            resp.raise_for_status()
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    return {
+        "ok": len(latencies),
+        "rejected": rejected,
+        "rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def bench_server(case: str, data: bytes, levels: list[int], requests: int, workers: int, batch_size: int,
+                 processes: int = 1, env: dict | None = None, startup_timeout: float = 300) -> list[dict]:
+    """
+    起一个本地 server（独立进程，同样的设备配置、不开缓存），逐个并发级别压测。
+
+    processes > 1 时为多进程部署（ocr_server.py --processes），env 覆盖传给 server 的环境变量。
+    """
+    sock = Path(tempfile.gettempdir()) / f"ocr-bench-{os.getpid()}.sock"
+    server_env = engine_env()
+    server_env.update(OCR_WORKERS=str(workers), OCR_BATCH_SIZE=str(batch_size), OCR_QUEUE_SIZE=str(max(levels)))
+    server_env.update(env or {})
+    proc = subprocess.Popen(
+        [sys.executable, str(ROOT / "ocr_server.py"), "--uds", str(sock), "--processes", str(processes)],
+        env=server_env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    records = []
+    try:
+        deadline = time.monotonic() + startup_timeout
+        # 预热请求在 CPU 上识别密集的大图，可能远超 httpx 默认的 5 秒
+        with httpx.Client(transport=httpx.HTTPTransport(uds=str(sock)), base_url="http://ocr",
+                          timeout=startup_timeout) as client:
+            # 等模型加载和预热完成
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"ocr_server exited with {proc.returncode}")
+                with suppress(httpx.TransportError):
+                    if client.get("/ready", timeout=5).status_code == 200:
+                        break
+                if time.monotonic() > deadline:
+                    raise RuntimeError("ocr_server did not become ready in time")
+                time.sleep(0.5)
+            # server 启动时已预热常见分辨率，这里再用压测图片各跑一次
+            for _ in range(workers * processes):
+                client.post("/ocr/upload", content=data).raise_for_status()
+
+        async def run_all():
+            transport = httpx.AsyncHTTPTransport(uds=str(sock))
+            async with httpx.AsyncClient(transport=transport, base_url="http://ocr", timeout=300) as client:
+                for c in levels:
+                    r = await _load(client, data, c, requests)
+                    records.append({"bench": "server", "case": f"{case}/c{c}", "concurrency": c, **r})
+
+        asyncio.run(run_all())
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        sock.unlink(missing_ok=True)
+    return records
+
+
+# ------------------------------------------------------------ 报告
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def metadata(args) -> dict:
+    return {
+        "commit": git_commit(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "paddleocr": ocr_engine._paddleocr_version(),
+        "device": ocr_engine.OCR_DEVICE,
+        "cpu_threads": ocr_engine.OCR_CPU_THREADS,
+        "mkldnn": ocr_engine.OCR_ENABLE_MKLDNN,
+        "precision": ocr_engine.OCR_PRECISION,
+        "args": {k: v for k, v in vars(args).items() if k not in ("compare", "output")},
+    }
+
+
+def compare(base: dict, new: dict, threshold: float = 0.05):
+    """逐项打印两份报告的差异，变化超过 threshold 的标出更快 / 更慢"""
+    print(f"base {base['meta']['commit']} ({base['meta']['time']})  →  new {new['meta']['commit']} ({new['meta']['time']})")
+    old = {(r["bench"], r["case"]): r for r in base["results"]}
+    print(f"{'bench':<11} {'case':<28} {'metric':<18} {'base':>10} {'new':>10} {'change':>8}")
+    for record in new["results"]:
+        prev = old.get((record["bench"], record["case"]))
+        if prev is None:
+            continue
+        for key, value in record.items():
+            lower = key.endswith(LOWER_IS_BETTER)
+            if not isinstance(value, (int, float)) or not (lower or key.endswith(HIGHER_IS_BETTER)):
+                continue
+            if not prev.get(key):
+                continue
+            change = value / prev[key] - 1
+            better = change < 0 if lower else change > 0
+            flag = "" if abs(change) < threshold else (" faster" if better else " SLOWER")
+            print(f"{record['bench']:<11} {record['case']:<28} {key:<18} {prev[key]:>10.2f} {value:>10.2f} "
+                  f"{change:>+7.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 基准测试套件，输出 JSON 报告")
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080", "2560x1440"])
+    parser.add_argument("--densities", nargs="+", choices=list(DENSITIES), default=list(DENSITIES))
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="recognize 每张图的重复次数 (默认: 5)")
+    parser.add_argument("--micro-repeat", type=int, default=200, help="match / build_text 的重复次数 (默认: 200)")
+    parser.add_argument("--cold-runs", type=int, default=2, help="冷启动测试的进程数，0 跳过 (默认: 2)")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[1, 4, 8],
+                        help="server 压测的并发级别 (默认: 1 4 8)")
+    parser.add_argument("-n", "--requests", type=int, default=32, help="每个并发级别的请求数 (默认: 32)")
+    parser.add_argument("--server-case", default="1920x1080-dense", help="server 压测用的图片 (默认: 1920x1080-dense)")
+    parser.add_argument("--workers", type=int, default=1, help="server 的 OCR_WORKERS (默认: 1)")
+    parser.add_argument("--batch-size", type=int, default=1, help="server 的 OCR_BATCH_SIZE (默认: 1)")
+    parser.add_argument("--no-server", action="store_true", help="跳过 server 压测")
+    parser.add_argument("--seed", type=int, default=0, help="合成截图的随机种子")
+    parser.add_argument("--font", help="合成截图用的字体文件 (默认自动查找中文字体)")
+    parser.add_argument("--quick", action="store_true", help="冒烟：只测 1280x720，重复次数和请求数都很少")
+    parser.add_argument("-o", "--output", help="报告路径 (默认: bench/results/<commit>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="REPORT",
+                        help="一份：跑完后与它对比；两份：不跑测试，只对比 BASE NEW")
+    ocr_engine.add_device_arguments(parser)
+    parser.set_defaults(device="cpu")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        base, new = (json.loads(Path(p).read_text()) for p in args.compare)
+        compare(base, new)
+        return
+    if args.quick:
+        args.resolutions, args.repeat, args.micro_repeat = ["1280x720"], 2, 20
+        args.cold_runs, args.concurrency, args.requests = min(args.cold_runs, 1), [1, 4], 8
+        args.server_case = f"1280x720-{args.densities[-1]}"
+    ocr_engine.configure_from_args(args)
+
+    cases = {}
+    for res in args.resolutions:
+        w, h = parse_resolution(res)
+        for density in args.densities:
+            cases[f"{res}-{density}"] = make_screenshot(w, h, density, args.seed, args.font)
+    if not args.no_server and args.server_case not in cases:
+        parser.error(f"--server-case {args.server_case} is not one of: {', '.join(cases)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.cold_runs > 0:
+            print("cold start...", file=sys.stderr)
+            image = Path(tmp) / "cold.png"
+            image.write_bytes(next(iter(cases.values()))[0])
+            results += bench_cold_start(image, args.cold_runs)
+
+    print("recognize...", file=sys.stderr)
+    records, recognized = bench_recognize(cases, args.repeat)
+    results += records
+    print("match / build_text...", file=sys.stderr)
+    results += bench_match(recognized, cases, args.micro_repeat)
+    results += bench_build_text(recognized, args.micro_repeat)
+    if not args.no_server:
+        print("server...", file=sys.stderr)
+        results += bench_server(args.server_case, cases[args.server_case][0], args.concurrency, args.requests,
+                                args.workers, args.batch_size)
+
+    report = {"meta": metadata(args), "results": results}
+    output = Path(args.output) if args.output else ROOT / "bench" / "results" / f"{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=float))
+    print(f"report: {output}", file=sys.stderr)
+
+    for record in results:
+        fields = " ".join(f"{k}={v:.2f}" for k, v in record.items() if isinstance(v, float))
+        print(f"{record['bench']:<11} {record['case']:<28} {fields}")
+    if args.compare:
+        print()
+        compare(json.loads(Path(args.compare[0]).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
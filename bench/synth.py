@@ -0,0 +1,165 @@
+"""
+合成测试截图：按给定分辨率和文字密度渲染类似网页 / 应用界面的图片，附带每个词的真实文字和位置
+
+同一组参数和 seed 生成的图片逐字节相同，不同提交之间的基准结果可以直接比较。
+有中文字体时中英文混排，否则只用英文（--font 指定字体文件）。
+
+用法: uv run python bench/synth.py -o /tmp/synth --resolutions 1280x720 1920x1080 --densities sparse dense
+"""
+import argparse
+import io
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# 常见的中文字体位置，依次尝试
+CJK_FONTS = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/wqy-microhei/wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "C:/Windows/Fonts/msyh.ttc",
+]
+LATIN_FONTS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+]
+
+WORDS_EN = (
+    "Home Search Settings Profile Login Logout Submit Cancel Save Delete Edit Share Download Upload "
+    "Next Previous Continue Back Help Account Orders Cart Checkout Payment Notifications Messages "
+    "Dashboard Reports Analytics Export Import Filter Sort Refresh Close Open Preview Publish Draft "
+    "Archive Members Invite Billing Security Privacy Terms Support Feedback Version Updated Today"
+).split()
+WORDS_ZH = (
+    "首页 搜索 设置 个人中心 登录 退出 提交 取消 保存 删除 编辑 分享 下载 上传 下一步 上一步 继续 返回 "
+    "帮助 账户 订单 购物车 结算 支付 通知 消息 工作台 报表 数据分析 导出 导入 筛选 排序 刷新 关闭 打开 "
+    "预览 发布 草稿 归档 成员 邀请 账单 安全 隐私 条款 客服 反馈 版本 更新于 今天"
+).split()
+
+# 密度：每行的词数范围和行距（行高的倍数）
+DENSITIES = {
+    "sparse": {"words": (1, 4), "spacing": 3.0},
+    "dense": {"words": (6, 16), "spacing": 1.6},
+}
+
+
+@lru_cache(maxsize=None)
+def find_font(path: str | None = None) -> tuple[str | None, bool]:
+    """返回 (字体文件, 是否支持中文)，都找不到时用 Pillow 内置字体"""
+    if path:
+        return path, True
+    for candidate in CJK_FONTS:
+        if Path(candidate).exists():
+            return candidate, True
+    for candidate in LATIN_FONTS:
+        if Path(candidate).exists():
+            return candidate, False
+    return None, False
+
+
+@lru_cache(maxsize=None)
+def _font(path: str | None, size: int):
+    return ImageFont.truetype(path, size) if path else ImageFont.load_default(size)
+
+
+def parse_resolution(text: str) -> tuple[int, int]:
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def make_screenshot(
+    width: int,
+    height: int,
+    density: str = "dense",
+    seed: int = 0,
+    font: str | None = None,
+    fmt: str = "png",
+) -> tuple[bytes, list[dict]]:
+    """
+    渲染一张合成截图。
+
+    顶部一行导航，下面是左对齐的文字行，每行随机几个词、随机字号（按分辨率缩放）和颜色。
+
+    Returns:
+        (编码后的图片字节, [{"text": 词, "bbox": [x1, y1, x2, y2]}, ...])
+    """
+    rng = np.random.default_rng(seed)
+    font_path, cjk = find_font(font)
+    vocab = WORDS_EN + WORDS_ZH if cjk else WORDS_EN
+    layout = DENSITIES[density]
+    scale = height / 1080
+
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    words = []
+
+    def put(x: int, y: int, text: str, size: int, fill) -> int:
+        f = _font(font_path, size)
+        x1, y1, x2, y2 = draw.textbbox((x, y), text, font=f)
+        if x2 > width - 8 or y2 > height - 8:
+            return -1
+        draw.text((x, y), text, font=f, fill=fill)
+        words.append({"text": text, "bbox": [x1, y1, x2, y2]})
+        return x2
+
+    # 导航栏
+    bar = int(64 * scale)
+    draw.rectangle([0, 0, width, bar], fill=(36, 41, 47))
+    x = int(24 * scale)
+    for text in rng.choice(vocab, 6, replace=False):
+        x = put(x, int(20 * scale), str(text), int(22 * scale), "white")
+        if x < 0:
+            break
+        x += int(40 * scale)
+
+    # 正文
+    y = bar + int(32 * scale)
+    while True:
+        size = int(rng.integers(16, 30) * scale)
+        lo, hi = layout["words"]
+        x = int(rng.integers(24, 120) * scale)
+        color = tuple(int(c) for c in rng.integers(0, 90, 3))
+        placed = False
+        for text in rng.choice(vocab, int(rng.integers(lo, hi + 1))):
+            end = put(x, y, str(text), size, color)
+            if end < 0:
+                break
+            placed = True
+            x = end + int(size * rng.uniform(0.4, 1.2))
+        if not placed and y + size > height - 8:
+            break
+        y += int(size * layout["spacing"])
+
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue(), words
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成测试截图")
+    parser.add_argument("-o", "--output", default="synth", help="输出目录 (默认: synth)")
+    parser.add_argument("--resolutions", nargs="+", default=["1280x720", "1920x1080", "2560x1440"])
+    parser.add_argument("--densities", nargs="+", choices=list(DENSITIES), default=list(DENSITIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", help="字体文件 (默认自动查找中文字体)")
+    args = parser.parse_args()
+
+    out = Path(args.output)
+    out.mkdir(parents=True, exist_ok=True)
+    for res in args.resolutions:
+        w, h = parse_resolution(res)
+        for density in args.densities:
+            data, words = make_screenshot(w, h, density, args.seed, args.font)
+            path = out / f"{res}-{density}.png"
+            path.write_bytes(data)
+            print(f"{path}  {len(words)} words")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+上传方式对比：base64 JSON (/ocr) vs 原始字节 (/ocr/upload) vs multipart (/ocr/upload)
+
+生成 1080p 和 4K 的 PNG 截图，分别统计请求体大小和端到端延迟（含客户端编码）。
+
+server 默认开启结果缓存（OCR_CACHE_ENTRIES=128），重复上传同一张图片测到的只是缓存命中。
+每个请求在 PNG 末尾追加一个递增序号（解码器忽略 IEND 之后的字节），内容不同、不会命中缓存。
+
+用法: uv run python bench/upload.py --url http://127.0.0.1:8089 -n 10
+"""
+import argparse
+import base64
+import io
+import itertools
+import json
+import time
+
+import httpx
+from PIL import Image, ImageDraw
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+_serial = itertools.count()
+
+
+def make_screenshot(width: int, height: int) -> bytes:
+    """生成带文字的 PNG 截图"""
+    img = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(img)
+    step = max(24, height // 40)
+    for i, y in enumerate(range(step, height - step, step)):
+        draw.text((step, y), f"Line {i} Submit Cancel Preview 0123456789", fill="black")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def bench(client: httpx.Client, url: str, png: bytes, mode: str, n: int) -> tuple[int, float]:
+    """返回 (请求体字节数, 平均延迟 ms)"""
+    size = 0
+    total = 0.0
+    for _ in range(n):
+        # 追加序号不算在计时内，base64 / multipart 编码仍计入
+        png_n = png + next(_serial).to_bytes(8, "little")
+        t0 = time.perf_counter()
+        if mode == "base64":
+            body = json.dumps({"image": base64.b64encode(png_n).decode()}).encode()
+            resp = client.post(f"{url}/ocr", content=body, headers={"content-type": "application/json"})
+            size = len(body)
+        elif mode == "raw":
+            resp = client.post(f"{url}/ocr/upload", content=png_n,
+                               headers={"content-type": "application/octet-stream"})
+            size = len(png_n)
+        else:
+            req = client.build_request("POST", f"{url}/ocr/upload", files={"file": ("s.png", png_n, "image/png")})
+            size = len(req.read())
+            resp = client.send(req)
+        resp.raise_for_status()
+        total += (time.perf_counter() - t0) * 1000
+    return size, total / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR Server 上传方式对比")
+    parser.add_argument("--url", default="http://127.0.0.1:8089", help="OCR Server 地址")
+    parser.add_argument("-n", "--requests", type=int, default=10, help="每种方式的请求数")
+    args = parser.parse_args()
+
+    print(f"{'res':>6} {'mode':>9} {'bytes':>11} {'avg ms':>8}")
+    with httpx.Client(timeout=120.0) as client:
+        for name, (w, h) in RESOLUTIONS.items():
+            png = make_screenshot(w, h)
+            for mode in ("base64", "raw", "multipart"):
+                size, avg = bench(client, args.url, png, mode, args.requests)
+                print(f"{name:>6} {mode:>9} {size:>11,} {avg:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
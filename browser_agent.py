@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+常驻浏览器代理
+
+serve 进程常驻：保持 Playwright driver 和 CDP 连接（以及 OCR 模型）不断开，
+通过本地 Unix socket 接收命令；其余子命令是瘦客户端，只用标准库，启动开销几十毫秒。
+
+协议：每行一个 JSON 请求，返回一行 JSON 响应，格式与 main.py -j 输出一致。
+
+用法:
+  browser_agent.py serve [--cdp URL]          # 启动代理（click.sh 会自动启动）
+  browser_agent.py click "发布" [--exact]      # 查找并点击
+  browser_agent.py find "发布"                 # 只查找
+  browser_agent.py expect "发布成功" [--gone] [--timeout 5]  # 验证文字出现 / 消失
+  browser_agent.py screenshot [PATH]          # 截图
+  browser_agent.py stop                       # 停止代理
+
+环境变量:
+    OCR_AGENT_SOCKET  代理监听的 Unix socket (默认 /tmp/ocr-browser-agent.sock)
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+OCR_AGENT_SOCKET = os.environ.get("OCR_AGENT_SOCKET", "/tmp/ocr-browser-agent.sock")
+DEFAULT_CDP_URL = "http://127.0.0.1:18800"
+
+
+# ---------------------------------------------------------------- 服务端
+
+class BrowserAgent:
+    """持有 Playwright 连接，串行执行命令"""
+
+    def __init__(self, cdp_url: str):
+        self.cdp_url = cdp_url
+        self.p = None
+        self.browser = None
+        self._lock = asyncio.Lock()
+        self._stop = asyncio.Event()
+
+    async def page(self):
+        """返回当前页面，浏览器断开时自动重连"""
+        from main import connect_browser
+
+        if self.browser is None or not self.browser.is_connected():
+            if self.p is not None:
+                await self.p.stop()
+            self.p, self.browser, page = await connect_browser(self.cdp_url)
+            return page
+        context = self.browser.contexts[0]
+        return context.pages[0] if context.pages else await context.new_page()
+
+    async def close(self):
+        if self.p is not None:
+            await self.p.stop()
+
+    async def _screenshot(self, page) -> bytes:
+        from main import take_screenshot
+        return await take_screenshot(page)
+
+    async def _recognize(self, screenshot: bytes):
+        from ocr import recognize
+        # OCR 是同步阻塞调用，放到线程里，保持 socket 可响应
+        return await asyncio.to_thread(recognize, screenshot)
+
+    async def _recognize_incremental(self, screenshot: bytes, base: tuple) -> tuple:
+        from ocr import recognize_incremental
+        return await asyncio.to_thread(recognize_incremental, screenshot, *base)
+
+    async def handle(self, req: dict) -> dict:
+        cmd = req.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "stop":
+            self._stop.set()
+            return {"ok": True}
+
+        async with self._lock:
+            page = await self.page()
+            if cmd == "screenshot":
+                screenshot = await self._screenshot(page)
+                path = req.get("path")
+                if not path:
+                    import tempfile
+                    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+                        path = f.name
+                Path(path).write_bytes(screenshot)
+                return {"ok": True, "path": path}
+            if cmd in ("find", "click"):
+                return await self._find_or_click(page, req, click=cmd == "click")
+            if cmd == "expect":
+                return await self._expect(page, req)
+        return {"ok": False, "error": "unknown_command", "cmd": cmd}
+
+    async def _find_or_click(self, page, req: dict, click: bool) -> dict:
+        from main import save_error_screenshot, screenshot_region
+        from ocr import find_text_item
+
+        target = req["target"]
+        region, near = req.get("region"), req.get("near")
+        incremental = req.get("incremental", False)
+        if region and not near and not incremental:
+            # 只截取并识别目标区域
+            screenshot, items = await screenshot_region(page, region)
+            region = None
+        else:
+            screenshot = await self._screenshot(page)
+            t0 = time.perf_counter()
+            items = await self._recognize(screenshot)
+            full_ms = (time.perf_counter() - t0) * 1000
+        item = find_text_item(
+            screenshot, target,
+            exact=req.get("exact", False),
+            region=region,
+            near=near,
+            items=items,
+            fuzzy=req.get("fuzzy", 0.0),
+        )
+        if not item:
+            save_error_screenshot(screenshot, f"not_found_{target}")
+            texts = [i["text"] for i in items[:15]]
+            return {"ok": False, "error": "not_found", "target": target, "texts": texts}
+
+        cx, cy = item["center"]
+        if not click:
+            return {"ok": True, "center": [cx, cy], "text": item["text"]}
+
+        dpr = await page.evaluate("window.devicePixelRatio")
+        actual_x, actual_y = int(cx / dpr), int(cy / dpr)
+        await page.mouse.click(actual_x, actual_y)
+
+        expect = {"text": req.get("expect"), "gone": req.get("expect_gone")}
+        base = (screenshot, items, full_ms) if incremental else None
+        if req.get("wait_until") and (expect["text"] or expect["gone"]):
+            # 轮询直到验证条件满足或超时，不再固定等待
+            expect["timeout"] = req.get("timeout", 10)
+        else:
+            wait = req.get("wait", 3)
+            if wait <= 0:
+                return {"ok": True, "clicked": [actual_x, actual_y]}
+            await asyncio.sleep(wait)
+            if not (expect["text"] or expect["gone"]):
+                return {"ok": True, "clicked": [actual_x, actual_y]}
+
+        # 点击后验证：再次截图 + OCR，--incremental 时以点击前的整图结果为基准
+        result = await self._expect(page, expect, base=base)
+        if not result["ok"]:
+            return result
+        return {**result, "clicked": [actual_x, actual_y]}
+
+    async def _expect(self, page, req: dict, base: tuple | None = None) -> dict:
+        from main import check_expect, save_error_screenshot, wait_for_expect
+
+        if req.get("timeout"):
+            error, screenshot, stats = await wait_for_expect(
+                page, req.get("text"), req.get("gone"),
+                timeout=req["timeout"], base=base[:2] if base else None,
+            )
+            result = error or {"ok": True, "wait": stats}
+        else:
+            screenshot = await self._screenshot(page)
+            stats = None
+            if base:
+                t0 = time.perf_counter()
+                items, stats = await self._recognize_incremental(screenshot, base[:2])
+                stats["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+                stats["full_ms"] = round(base[2], 1)
+                stats["saved_ms"] = round(base[2] - stats["ms"], 1)
+            else:
+                items = await self._recognize(screenshot)
+            error = check_expect(items, req.get("text"), req.get("gone"))
+            result = error or ({"ok": True, "incremental": stats} if stats else {"ok": True})
+
+        if error:
+            save_error_screenshot(screenshot, f"{error['error']}_{error.get('expect') or error.get('text')}")
+        return result
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                try:
+                    resp = await self.handle(json.loads(line))
+                except Exception as e:
+                    resp = {"ok": False, "error": type(e).__name__, "message": str(e)}
+                writer.write(json.dumps(resp, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, sock_path: str):
+        Path(sock_path).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(self._serve_client, path=sock_path)
+        print(f"browser agent listening on {sock_path}", file=sys.stderr)
+        try:
+            async with server:
+                await self._stop.wait()
+        finally:
+            await self.close()
+            Path(sock_path).unlink(missing_ok=True)
+
+
+# ---------------------------------------------------------------- 客户端
+
+def send_command(req: dict, sock_path: str = OCR_AGENT_SOCKET, timeout: float = 120.0) -> dict:
+    """发送一条命令给代理并返回响应"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(sock_path)
+        s.sendall(json.dumps(req, ensure_ascii=False).encode() + b"\n")
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    if not buf:
+        raise ConnectionError("browser agent closed the connection")
+    return json.loads(buf)
+
+
+def ensure_agent(cdp_url: str, sock_path: str = OCR_AGENT_SOCKET, timeout: float = 30.0):
+    """代理未运行时在后台启动，并等待 socket 可用"""
+    try:
+        send_command({"cmd": "ping"}, sock_path, timeout=2)
+        return
+    except OSError:
+        pass
+
+    log = open("/tmp/ocr-browser-agent.log", "ab")
+    subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "serve", "--cdp", cdp_url, "--socket", sock_path],
+        stdout=log, stderr=log, stdin=subprocess.DEVNULL,
+        start_new_session=True,
+        env=dict(os.environ, PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK="True"),
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        try:
+            send_command({"cmd": "ping"}, sock_path, timeout=2)
+            return
+        except OSError:
+            continue
+    raise RuntimeError("browser agent did not start, see /tmp/ocr-browser-agent.log")
+
+
+def print_result(resp: dict, output_json: bool, quiet: bool):
+    """按 main.py 的格式输出结果，失败时 exit 1"""
+    if output_json:
+        print(json.dumps(resp, ensure_ascii=False))
+    elif resp.get("ok"):
+        if quiet:
+            pass
+        elif "clicked" in resp:
+            print(f"clicked:{resp['clicked'][0]},{resp['clicked'][1]}")
+            if stats := resp.get("incremental"):
+                print(f"incremental: dirty={stats['dirty_ratio']:.1%} regions={stats['regions']} "
+                      f"{stats['ms']:.0f}ms full={stats['full_ms']:.0f}ms saved={stats['saved_ms']:.0f}ms",
+                      file=sys.stderr)
+            if stats := resp.get("wait"):
+                print(f"wait: {stats['elapsed_ms']:.0f}ms polls={stats['polls']} ocr_runs={stats['ocr_runs']}",
+                      file=sys.stderr)
+        elif "center" in resp:
+            print(f"found:{resp['center'][0]},{resp['center'][1]}")
+        elif "path" in resp:
+            print(resp["path"])
+    else:
+        error = resp.get("error")
+        detail = resp.get("target") or resp.get("expect") or resp.get("text") or resp.get("message", "")
+        print(f"{error}:{detail}", file=sys.stderr)
+    if not resp.get("ok"):
+        sys.exit(1)
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--socket", default=OCR_AGENT_SOCKET, help="代理 Unix socket 路径")
+    common.add_argument("--cdp", default=DEFAULT_CDP_URL, metavar="URL", help="CDP 连接地址")
+    common.add_argument("-j", "--json", action="store_true", help="JSON 输出")
+    common.add_argument("-q", "--quiet", action="store_true", help="静默模式 (成功无输出)")
+
+    parser = argparse.ArgumentParser(description="常驻浏览器代理")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("serve", parents=[common], help="启动代理（前台运行）")
+    p.add_argument("--screenshot-format", choices=["png", "jpeg"], default="png",
+                   help="截图编码格式，jpeg 编码更快 (默认: png)")
+    sub.add_parser("stop", parents=[common], help="停止代理")
+
+    for name in ("click", "find"):
+        p = sub.add_parser(name, parents=[common])
+        p.add_argument("target", help="要查找的文字")
+        p.add_argument("-e", "--exact", action="store_true", help="精确匹配")
+        p.add_argument("--fuzzy", type=float, default=0.0, metavar="RATIO",
+                       help="近似匹配，允许的编辑距离 = 目标长度 * RATIO (例如 0.2)")
+        p.add_argument("--region", metavar="REGION",
+                       help="top/bottom/left/right/center 或 x1,y1,x2,y2（像素或比例）")
+        p.add_argument("--near", metavar="TEXT")
+        if name == "click":
+            p.add_argument("-w", "--wait", type=float, default=3, metavar="SEC",
+                           help="点击后等待秒数 (默认: 3)")
+            p.add_argument("--expect", metavar="TEXT", help="期望点击后出现的文字")
+            p.add_argument("--expect-gone", metavar="TEXT", help="期望点击后消失的文字")
+            p.add_argument("--incremental", action="store_true",
+                           help="点击后验证只重新识别画面变化的区域")
+            p.add_argument("--wait-until", action="store_true",
+                           help="点击后轮询直到 --expect/--expect-gone 满足，代替固定等待 -w")
+            p.add_argument("--timeout", type=float, default=10, metavar="SEC",
+                           help="--wait-until 的最长等待秒数 (默认: 10)")
+
+    p = sub.add_parser("expect", parents=[common])
+    p.add_argument("text")
+    p.add_argument("--gone", action="store_true", help="验证文字已消失")
+    p.add_argument("--timeout", type=float, default=0, metavar="SEC",
+                   help="轮询等待最多 SEC 秒直到满足 (默认: 0，只检查一次)")
+
+    p = sub.add_parser("screenshot", parents=[common])
+    p.add_argument("path", nargs="?")
+
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        import main as cli
+        cli.SCREENSHOT_FORMAT = args.screenshot_format
+        asyncio.run(BrowserAgent(args.cdp).serve(args.socket))
+        return
+    if args.cmd == "stop":
+        try:
+            send_command({"cmd": "stop"}, args.socket, timeout=5)
+        except (OSError, ValueError):
+            pass
+        return
+
+    req = {"cmd": args.cmd}
+    if args.cmd in ("click", "find"):
+        req.update(target=args.target, exact=args.exact, region=args.region, near=args.near, fuzzy=args.fuzzy)
+        if args.cmd == "click":
+            req.update(wait=args.wait, expect=args.expect, expect_gone=args.expect_gone,
+                       incremental=args.incremental, wait_until=args.wait_until, timeout=args.timeout)
+    elif args.cmd == "expect":
+        req.update({"gone" if args.gone else "text": args.text}, timeout=args.timeout)
+    elif args.cmd == "screenshot":
+        req["path"] = args.path
+
+    ensure_agent(args.cdp, args.socket)
+    timeout = 120.0 + (req.get("timeout") or 0)
+    print_result(send_command(req, args.socket, timeout=timeout), args.json, args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,35 @@
 #!/bin/bash
 # 快捷点击: click.sh "文字" [--exact] [-v]
 # 默认静默模式，-v 显示输出
+# 通过常驻浏览器代理执行 (browser_agent.py，首次调用自动启动)，
+# 省掉每次启动 Playwright、连接 CDP 和加载模型的开销；
+# 带代理不支持的 main.py 参数 (-s/--save、--jsonl、--timings、--device 等) 时仍由 main.py 执行
 
 script_path="$(cd "$(dirname "$0")" && pwd)"
 cd "$script_path"
 
 [ -z "$1" ] && { echo "用法: click.sh <文字> [--exact] [-v]"; exit 1; }
 
-# 检查是否有 -v 参数
+# 检查是否有 -v 参数，以及是否有只有 main.py 支持的参数
 quiet="-q"
 args=()
+agent=1
 for arg in "$@"; do
+    case "$arg" in
+        -s|--save|--save=*|--jsonl|--timings|--debug-dir|--debug-dir=*|\
+        --screenshot-format|--screenshot-format=*|--jpeg-quality|--jpeg-quality=*|\
+        --device|--device=*|--cpu-threads|--cpu-threads=*|--no-mkldnn|--precision|--precision=*)
+            agent="" ;;
+    esac
     [ "$arg" = "-v" ] && quiet="" || args+=("$arg")
 done
 
-PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK=True uv run python main.py --cdp -t "${args[@]}" --click $quiet
+if [ -z "$agent" ]; then
+    PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK=True exec uv run python main.py --cdp -t "${args[@]}" --click $quiet
+fi
+
+# 瘦客户端只用标准库，直接用 venv 的 python，跳过 uv run 的启动开销
+python="$script_path/.venv/bin/python"
+[ -x "$python" ] || python="uv run python"
+
+PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK=True $python browser_agent.py click "${args[@]}" $quiet
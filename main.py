@@ -10,16 +10,21 @@ OCR 浏览器自动化工具
 """
 import argparse
 import asyncio
+import hashlib
 import json
-import tempfile
 import sys
-import shutil
+import time
 from datetime import datetime
 from pathlib import Path
 
 from playwright.async_api import async_playwright
 
-from ocr import recognize, find_text, find_text_item
+from ocr import (
+    REGION_PADDING, recognize, recognize_incremental, ensure_ready, find_text_item,
+    region_rect, is_batch_source, print_batch, write_jsonl,
+    add_device_arguments, configure_from_args, report_timings, start_timings, timed,
+)
+from ocr_result import OCRResult
 
 # Clawdbot 默认 CDP 端口
 DEFAULT_CDP_URL = "http://127.0.0.1:18800"
@@ -27,18 +32,126 @@ DEFAULT_CDP_URL = "http://127.0.0.1:18800"
 # 错误截图保存目录
 ERROR_SCREENSHOT_DIR = Path("/tmp/ocr-debug")
 
+# 截图格式：jpeg 编码比 png 快得多，代价是轻微压缩失真
+SCREENSHOT_FORMAT = "png"
+JPEG_QUALITY = 90
 
-def save_error_screenshot(screenshot_path: str, reason: str) -> str:
-    """保存错误截图到调试目录"""
+# --wait-until 的轮询间隔范围 (秒)：画面变化时用最短间隔，静止时逐次翻倍
+POLL_MIN_INTERVAL = 0.1
+POLL_MAX_INTERVAL = 1.0
+
+
+async def take_screenshot(page, clip: dict = None) -> bytes:
+    """viewport 截图，直接返回编码后的字节，不落盘；clip 为 CSS 像素的 {x, y, width, height}"""
+    with timed("screenshot"):
+        if SCREENSHOT_FORMAT == "jpeg":
+            return await page.screenshot(full_page=False, clip=clip, type="jpeg", quality=JPEG_QUALITY)
+        return await page.screenshot(full_page=False, clip=clip, type="png")
+
+
+async def screenshot_region(page, region: str) -> tuple[bytes, OCRResult]:
+    """
+    只截取并识别 region 对应的区域（四周多留 REGION_PADDING 像素，避免切断文字）
+
+    返回 (区域截图, 识别结果)，识别结果的坐标已换算回整个 viewport 截图的像素坐标，
+    并且只保留中心点落在 region 内的项，与整图识别后按 region 过滤的结果一致。
+    """
+    vw, vh, dpr = await page.evaluate("[window.innerWidth, window.innerHeight, window.devicePixelRatio]")
+    img_size = (round(vw * dpr), round(vh * dpr))
+    x1, y1, x2, y2 = region_rect(region, img_size, padding=REGION_PADDING)
+    clip = {"x": x1 / dpr, "y": y1 / dpr, "width": (x2 - x1) / dpr, "height": (y2 - y1) / dpr}
+    screenshot = await take_screenshot(page, clip=clip)
+    items = (await asyncio.to_thread(recognize, screenshot)).offset(x1, y1, img_size)
+    return screenshot, items[items.in_rect(region_rect(region, img_size))]
+
+
+def _screenshot_suffix(screenshot: bytes) -> str:
+    return ".jpg" if screenshot[:2] == b"\xff\xd8" else ".png"
+
+
+def save_error_screenshot(screenshot: bytes, reason: str) -> str:
+    """保存错误截图到调试目录（截图只在出错时才写盘）"""
     ERROR_SCREENSHOT_DIR.mkdir(exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     safe_reason = reason.replace(" ", "_").replace("/", "-")[:30]
-    dest = ERROR_SCREENSHOT_DIR / f"{timestamp}_{safe_reason}.png"
-    shutil.copy(screenshot_path, dest)
+    dest = ERROR_SCREENSHOT_DIR / f"{timestamp}_{safe_reason}{_screenshot_suffix(screenshot)}"
+    dest.write_bytes(screenshot)
     print(f"📸 截图已保存: {dest}", file=sys.stderr)
     return str(dest)
 
 
+def check_expect(items: OCRResult, expect_text: str = None, expect_gone: str = None) -> dict | None:
+    """检查识别结果是否满足验证条件，不满足时返回错误（格式与 -j 输出一致）"""
+    texts_str = " ".join(OCRResult.from_items(items).texts).lower()
+    if expect_text and expect_text.lower() not in texts_str:
+        return {"ok": False, "error": "expect_failed", "expect": expect_text}
+    if expect_gone and expect_gone.lower() in texts_str:
+        return {"ok": False, "error": "still_exists", "text": expect_gone}
+    return None
+
+
+def _exit_expect_failed(screenshot: bytes, error: dict, output_json: bool, quiet: bool):
+    """验证失败：保存截图，按输出模式打印错误后 exit 1"""
+    detail = error.get("expect") or error.get("text")
+    save_error_screenshot(screenshot, f"{error['error']}_{detail}")
+    if output_json:
+        print(json.dumps(error, ensure_ascii=False))
+    elif not quiet:
+        print(f"{error['error']}:{detail}", file=sys.stderr)
+    sys.exit(1)
+
+
+async def wait_for_expect(
+    page,
+    expect_text: str = None,
+    expect_gone: str = None,
+    timeout: float = 10,
+    base: tuple[bytes, OCRResult] | None = None,
+) -> tuple[dict | None, bytes, dict]:
+    """
+    轮询截图 + OCR，直到 expect_text 出现、expect_gone 消失或超时。
+
+    截图字节哈希与上一帧相同（画面没变）时跳过识别；轮询间隔从 POLL_MIN_INTERVAL 开始，
+    画面静止时逐次翻倍到 POLL_MAX_INTERVAL，画面一变化就恢复最短间隔。
+    base 为 (截图, 整图识别结果) 时，每帧都相对上一次识别的帧做增量识别。
+
+    Returns:
+        (超时时最后一次的错误，满足时为 None, 最后一帧截图, 统计 {"polls", "ocr_runs", "elapsed_ms"})
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + timeout
+    interval = POLL_MIN_INTERVAL
+    last_hash = None
+    error = None
+    polls = ocr_runs = 0
+    while True:
+        screenshot = await take_screenshot(page)
+        polls += 1
+        frame_hash = hashlib.blake2b(screenshot, digest_size=16).digest()
+        if frame_hash != last_hash:
+            last_hash = frame_hash
+            interval = POLL_MIN_INTERVAL
+            if base:
+                items, _ = await asyncio.to_thread(recognize_incremental, screenshot, *base)
+                base = (screenshot, items)
+            else:
+                items = await asyncio.to_thread(recognize, screenshot)
+            ocr_runs += 1
+            error = check_expect(items, expect_text, expect_gone)
+            if error is None:
+                break
+        else:
+            interval = min(interval * 2, POLL_MAX_INTERVAL)
+
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(interval, remaining))
+
+    stats = {"polls": polls, "ocr_runs": ocr_runs, "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1)}
+    return error, screenshot, stats
+
+
 async def connect_browser(cdp_url: str = DEFAULT_CDP_URL):
     """连接到已运行的浏览器"""
     p = await async_playwright().start()
@@ -61,6 +174,11 @@ async def screenshot_ocr(
     quiet: bool = False,
     region: str = None,
     near: str = None,
+    jsonl: bool = False,
+    incremental: bool = False,
+    wait_until: bool = False,
+    timeout: float = 10,
+    fuzzy: float = 0.0,
 ):
     """
     截取当前页面并 OCR 识别。
@@ -71,26 +189,46 @@ async def screenshot_ocr(
         exact: 精确匹配
         click: 找到后点击
         output_json: JSON 输出
+        jsonl: 不查找文字时每个识别结果输出一行 JSON
         save_screenshot: 保存截图到指定路径 (None=不保存)
+        incremental: 点击后验证时只重新识别画面变化的区域，其余沿用点击前的结果
+        wait_until: 点击后轮询直到验证条件满足（最多 timeout 秒），代替固定等待 wait_after_click
+        fuzzy: 近似匹配目标文字，允许的编辑距离 = 目标长度 * fuzzy
     """
     p, browser, page = await connect_browser(cdp_url)
-    screenshot_path = None
-    error_occurred = False
-    
+    screenshot = None
+    items = None
+    base = None  # (截图, 整图识别结果, 识别耗时 ms)，作为点击后增量识别的基准
+
     try:
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-            screenshot_path = f.name
+        if incremental:
+            ensure_ready()
+
+        if target and region and not near and not save_screenshot and not incremental:
+            # 只截取目标区域，截图编码和 OCR 都只处理这一块
+            screenshot, items = await screenshot_region(page, region)
+            region = None
+        else:
+            # viewport 截图
+            screenshot = await take_screenshot(page)
 
-        # viewport 截图
-        await page.screenshot(path=screenshot_path, full_page=False)
-        
-        # 如果指定了保存路径，复制一份
+        # 如果指定了保存路径，写一份
         if save_screenshot:
-            shutil.copy(screenshot_path, save_screenshot)
+            Path(save_screenshot).write_bytes(screenshot)
             print(f"📸 截图已保存: {save_screenshot}", file=sys.stderr)
 
         if target:
-            item = find_text_item(screenshot_path, target, exact=exact, region=region, near=near)
+            if items is None:
+                # --near 需要整张图里的参照文字，--incremental 需要整图结果作为基准，
+                # 此时只对目标做区域过滤
+                whole = near or incremental or not region
+                t0 = time.perf_counter()
+                items = recognize(screenshot, region=None if whole else region)
+                if whole:
+                    base = (screenshot, items, (time.perf_counter() - t0) * 1000)
+            item = find_text_item(
+                screenshot, target, exact=exact, region=region, near=near, items=items, fuzzy=fuzzy,
+            )
             if item:
                 cx, cy = item["center"]
 
@@ -100,37 +238,52 @@ async def screenshot_ocr(
                     actual_x, actual_y = int(cx / dpr), int(cy / dpr)
                     await page.mouse.click(actual_x, actual_y)
 
-                    if wait_after_click > 0:
+                    stats = None
+                    wait_stats = None
+                    if wait_until and (expect_text or expect_gone):
+                        # 轮询直到验证条件满足或超时，不再固定等待
+                        error, screenshot, wait_stats = await wait_for_expect(
+                            page, expect_text, expect_gone, timeout=timeout,
+                            base=base[:2] if incremental and base else None,
+                        )
+                        if not quiet and not output_json:
+                            print(f"⏱ 等待 {wait_stats['elapsed_ms'] / 1000:.2f}s "
+                                  f"({wait_stats['polls']} 帧，识别 {wait_stats['ocr_runs']} 次)",
+                                  file=sys.stderr)
+                        if error:
+                            _exit_expect_failed(screenshot, error, output_json, quiet)
+                    elif wait_after_click > 0:
                         await asyncio.sleep(wait_after_click)
 
-                        # 点击后验证：再次截图 + OCR
-                        await page.screenshot(path=screenshot_path, full_page=False)
-                        new_items = recognize(screenshot_path)
-                        new_texts_str = " ".join([i["text"] for i in new_items])
-
-                        # 验证期望出现的文字
-                        if expect_text:
-                            if expect_text.lower() not in new_texts_str.lower():
-                                save_error_screenshot(screenshot_path, f"expect_failed_{expect_text}")
-                                if output_json:
-                                    print(json.dumps({"ok": False, "error": "expect_failed", "expect": expect_text}, ensure_ascii=False))
-                                elif not quiet:
-                                    print(f"expect_failed:{expect_text}", file=sys.stderr)
-                                sys.exit(1)
-
-                        # 验证期望消失的文字
-                        if expect_gone:
-                            if expect_gone.lower() in new_texts_str.lower():
-                                save_error_screenshot(screenshot_path, f"still_exists_{expect_gone}")
-                                if output_json:
-                                    print(json.dumps({"ok": False, "error": "still_exists", "text": expect_gone}, ensure_ascii=False))
-                                elif not quiet:
-                                    print(f"still_exists:{expect_gone}", file=sys.stderr)
-                                sys.exit(1)
+                        # 点击后验证：再次截图 + OCR（没有验证条件时跳过）
+                        if expect_text or expect_gone:
+                            screenshot = await take_screenshot(page)
+                            if incremental and base:
+                                t0 = time.perf_counter()
+                                new_items, stats = recognize_incremental(screenshot, base[0], base[1])
+                                stats["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+                                stats["full_ms"] = round(base[2], 1)
+                                stats["saved_ms"] = round(base[2] - stats["ms"], 1)
+                                if not quiet and not output_json:
+                                    print(f"🔁 增量识别: 重新识别 {stats['dirty_ratio']:.1%} 像素 "
+                                          f"({stats['regions']} 块) {stats['ms']:.0f}ms，"
+                                          f"整图 {stats['full_ms']:.0f}ms，节省 {stats['saved_ms']:.0f}ms",
+                                          file=sys.stderr)
+                            else:
+                                new_items = recognize(screenshot)
+
+                            error = check_expect(new_items, expect_text, expect_gone)
+                            if error:
+                                _exit_expect_failed(screenshot, error, output_json, quiet)
 
                     # 成功输出
                     if output_json:
-                        print(json.dumps({"ok": True, "clicked": [actual_x, actual_y]}, ensure_ascii=False))
+                        result = {"ok": True, "clicked": [actual_x, actual_y]}
+                        if stats:
+                            result["incremental"] = stats
+                        if wait_stats:
+                            result["wait"] = wait_stats
+                        print(json.dumps(result, ensure_ascii=False))
                     elif not quiet:
                         print(f"clicked:{actual_x},{actual_y}")
                 else:
@@ -140,9 +293,7 @@ async def screenshot_ocr(
                     elif not quiet:
                         print(f"found:{cx},{cy}")
             else:
-                error_occurred = True
-                save_error_screenshot(screenshot_path, f"not_found_{target}")
-                items = recognize(screenshot_path)
+                save_error_screenshot(screenshot, f"not_found_{target}")
                 texts = [i["text"] for i in items[:15]]
                 if output_json:
                     print(json.dumps({"ok": False, "error": "not_found", "target": target, "texts": texts}, ensure_ascii=False))
@@ -150,22 +301,22 @@ async def screenshot_ocr(
                     print(f"not_found:{target}", file=sys.stderr)
                 sys.exit(1)
         else:
-            items = recognize(screenshot_path)
-            if output_json:
-                print(json.dumps(items, ensure_ascii=False, indent=2))
+            items = recognize(screenshot)
+            if jsonl:
+                for item in items:
+                    write_jsonl(item)
+            elif output_json:
+                print(json.dumps(items.to_items(), ensure_ascii=False, indent=2))
             else:
                 for item in items:
                     bbox = item["bbox"]
                     print(f"({bbox[0]},{bbox[1]}) ({bbox[2]},{bbox[3]}) | {item['text']}")
 
     except Exception as e:
-        error_occurred = True
-        if screenshot_path and Path(screenshot_path).exists():
-            save_error_screenshot(screenshot_path, f"error_{type(e).__name__}")
+        if screenshot:
+            save_error_screenshot(screenshot, f"error_{type(e).__name__}")
         raise
     finally:
-        if screenshot_path and Path(screenshot_path).exists() and not error_occurred:
-            Path(screenshot_path).unlink()
         await p.stop()
 
 
@@ -182,39 +333,37 @@ async def ocr_and_click(
         成功返回点击坐标，失败返回 None
     """
     p, browser, page = await connect_browser(cdp_url)
-    screenshot_path = None
-    
+    screenshot = None
+
     try:
         if wait_ms > 0:
             await asyncio.sleep(wait_ms / 1000)
-            
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-            screenshot_path = f.name
 
-        await page.screenshot(path=screenshot_path, full_page=False)
-        item = find_text_item(screenshot_path, target, exact=exact)
-        
+        screenshot = await take_screenshot(page)
+        item = find_text_item(screenshot, target, exact=exact)
+
         if item:
             # 获取 devicePixelRatio 校正坐标
             dpr = await page.evaluate("window.devicePixelRatio")
             cx, cy = item["center"]
             actual_x, actual_y = int(cx / dpr), int(cy / dpr)
             await page.mouse.click(actual_x, actual_y)
-            Path(screenshot_path).unlink()
             return (actual_x, actual_y)
         else:
             # 保存错误截图
-            save_error_screenshot(screenshot_path, f"click_failed_{target}")
+            save_error_screenshot(screenshot, f"click_failed_{target}")
             return None
     except Exception as e:
-        if screenshot_path and Path(screenshot_path).exists():
-            save_error_screenshot(screenshot_path, f"error_{type(e).__name__}")
+        if screenshot:
+            save_error_screenshot(screenshot, f"error_{type(e).__name__}")
         raise
     finally:
         await p.stop()
 
 
-async def screenshot_and_ocr_url(url: str, target: str = None, output_json: bool = False, quiet: bool = False):
+async def screenshot_and_ocr_url(
+    url: str, target: str = None, output_json: bool = False, quiet: bool = False, jsonl: bool = False,
+):
     """
     打开 URL 截图并 OCR（启动新浏览器）
     """
@@ -224,13 +373,11 @@ async def screenshot_and_ocr_url(url: str, target: str = None, output_json: bool
         await page.goto(url)
         await page.wait_for_load_state("networkidle")
 
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
-            screenshot_path = f.name
-
-        await page.screenshot(path=screenshot_path, full_page=False)
+        screenshot = await take_screenshot(page)
 
+        items = recognize(screenshot)
         if target:
-            item = find_text_item(screenshot_path, target)
+            item = find_text_item(screenshot, target, items=items)
             if item:
                 cx, cy = item["center"]
                 if output_json:
@@ -238,7 +385,6 @@ async def screenshot_and_ocr_url(url: str, target: str = None, output_json: bool
                 elif not quiet:
                     print(f"found:{cx},{cy}")
             else:
-                items = recognize(screenshot_path)
                 texts = [i["text"] for i in items[:15]]
                 if output_json:
                     print(json.dumps({"ok": False, "error": "not_found", "target": target, "texts": texts}, ensure_ascii=False))
@@ -246,24 +392,29 @@ async def screenshot_and_ocr_url(url: str, target: str = None, output_json: bool
                     print(f"not_found:{target}", file=sys.stderr)
                 sys.exit(1)
         else:
-            items = recognize(screenshot_path)
-            if output_json:
+            if jsonl:
+                for i in items:
+                    write_jsonl({"text": i["text"], "center": i["center"]})
+            elif output_json:
                 simple = [{"text": i["text"], "center": i["center"]} for i in items]
                 print(json.dumps(simple, ensure_ascii=False))
             elif not quiet:
                 for item in items:
                     print(f"{item['center'][0]},{item['center'][1]}|{item['text']}")
 
-        Path(screenshot_path).unlink()
         await browser.close()
 
 
-async def ocr_local_image(img_path: str, target: str = None, exact: bool = False, output_json: bool = False, quiet: bool = False):
+async def ocr_local_image(
+    img_path: str, target: str = None, exact: bool = False, output_json: bool = False, quiet: bool = False,
+    jsonl: bool = False, fuzzy: float = 0.0,
+):
     """
     对本地图片进行 OCR
     """
+    items = recognize(img_path)
     if target:
-        item = find_text_item(img_path, target, exact=exact)
+        item = find_text_item(img_path, target, exact=exact, items=items, fuzzy=fuzzy)
         if item:
             cx, cy = item["center"]
             if output_json:
@@ -271,7 +422,6 @@ async def ocr_local_image(img_path: str, target: str = None, exact: bool = False
             elif not quiet:
                 print(f"found:{cx},{cy}")
         else:
-            items = recognize(img_path)
             texts = [i["text"] for i in items[:15]]
             if output_json:
                 print(json.dumps({"ok": False, "error": "not_found", "target": target, "texts": texts}, ensure_ascii=False))
@@ -279,8 +429,10 @@ async def ocr_local_image(img_path: str, target: str = None, exact: bool = False
                 print(f"not_found:{target}", file=sys.stderr)
             sys.exit(1)
     else:
-        items = recognize(img_path)
-        if output_json:
+        if jsonl:
+            for i in items:
+                write_jsonl({"text": i["text"], "center": i["center"]})
+        elif output_json:
             # 精简输出：只保留 text 和 center
             simple = [{"text": i["text"], "center": i["center"]} for i in items]
             print(json.dumps(simple, ensure_ascii=False))
@@ -297,10 +449,12 @@ def main():
 示例:
   %(prog)s screenshot.png              # 本地图片 OCR
   %(prog)s screenshot.png -t "登录"    # 查找文字
+  %(prog)s shots/ -t "登录"            # 批量：目录 / "shots/*.png" / - (stdin)，输出 JSON Lines
   %(prog)s --cdp                       # 截取浏览器页面
   %(prog)s --cdp -t "发布" --click     # 查找并点击
   %(prog)s --cdp -t "发布" -c -q       # 静默点击 (省token)
   %(prog)s --cdp -t "发布" -c -j       # JSON输出
+  %(prog)s --cdp -t "发布" -c --expect "发布成功" --wait-until   # 等到出现为止
 
 输出格式:
   默认: clicked:500,300 / found:500,300 / not_found:目标
@@ -308,11 +462,16 @@ def main():
   静默: 成功无输出(exit 0), 失败输出错误(exit 1)
         """
     )
-    parser.add_argument("source", nargs="?", help="图片路径或 URL")
+    parser.add_argument("source", nargs="?",
+                       help="图片路径或 URL；目录、通配符或 - (从 stdin 逐行读路径) 为批量模式")
     parser.add_argument("-t", "--target", help="查找特定文字")
     parser.add_argument("-e", "--exact", action="store_true", help="精确匹配")
+    parser.add_argument("--fuzzy", type=float, default=0.0, metavar="RATIO",
+                       help="近似匹配，容忍 0/O、1/l 等识别误差，允许的编辑距离 = 目标长度 * RATIO (例如 0.2)")
     parser.add_argument("-c", "--click", action="store_true", help="找到后点击 (需要 --cdp)")
     parser.add_argument("-j", "--json", action="store_true", help="JSON 输出")
+    parser.add_argument("--jsonl", action="store_true",
+                       help="JSON Lines 输出：每个识别结果一行紧凑 JSON (装了 orjson 时更快)")
     parser.add_argument("-q", "--quiet", action="store_true", help="静默模式 (成功无输出)")
     parser.add_argument("-s", "--save", metavar="PATH", help="保存截图到指定路径")
     parser.add_argument("-w", "--wait", type=float, default=3, metavar="SEC",
@@ -323,18 +482,42 @@ def main():
                        help="期望点击后消失的文字 (验证成功)")
     parser.add_argument("--cdp", nargs="?", const=DEFAULT_CDP_URL, metavar="URL",
                        help=f"连接已运行的浏览器 (默认: {DEFAULT_CDP_URL})")
-    parser.add_argument("--region", choices=["top", "bottom", "left", "right", "center"],
-                       help="位置过滤：只在指定区域查找")
+    parser.add_argument("--region", metavar="REGION",
+                       help="位置过滤：只截取并识别指定区域，可选 top/bottom/left/right/center "
+                            "或 x1,y1,x2,y2（像素，或全部 <=1 时为比例）")
     parser.add_argument("--near", metavar="TEXT",
                        help="上下文匹配：查找靠近此文字的目标")
+    parser.add_argument("--wait-until", action="store_true",
+                       help="点击后轮询直到 --expect/--expect-gone 满足，代替固定等待 -w")
+    parser.add_argument("--timeout", type=float, default=10, metavar="SEC",
+                       help="--wait-until 的最长等待秒数 (默认: 10)")
+    parser.add_argument("--incremental", action="store_true",
+                       help="点击后验证只重新识别画面变化的区域，并输出重识别比例和节省的耗时")
+    parser.add_argument("--batch-size", type=int, default=8, help="批量模式每次合并推理的图片数 (默认: 8)")
+    parser.add_argument("--workers", type=int, default=4, help="批量模式读取解码线程数 (默认: 4)")
     parser.add_argument("--debug-dir", default="/tmp/ocr-debug",
                        help="错误截图保存目录 (默认: /tmp/ocr-debug)")
+    parser.add_argument("--screenshot-format", choices=["png", "jpeg"], default="png",
+                       help="截图编码格式，jpeg 编码更快 (默认: png)")
+    parser.add_argument("--jpeg-quality", type=int, default=90, metavar="Q",
+                       help="jpeg 截图质量 (默认: 90)")
+    parser.add_argument("--timings", action="store_true",
+                       help="结束时输出截图、解码、推理、匹配等各阶段耗时 ms (stderr 一行 JSON)")
+    add_device_arguments(parser)
     args = parser.parse_args()
+    configure_from_args(args)
+    if args.timings:
+        report_timings(start_timings())
 
-    # 设置错误截图目录
-    global ERROR_SCREENSHOT_DIR
+    # 设置错误截图目录和截图格式
+    global ERROR_SCREENSHOT_DIR, SCREENSHOT_FORMAT, JPEG_QUALITY
     ERROR_SCREENSHOT_DIR = Path(args.debug_dir)
+    SCREENSHOT_FORMAT = args.screenshot_format
+    JPEG_QUALITY = args.jpeg_quality
     
+    # --jsonl 下查找 / 点击等单条结果与 -j 输出相同
+    output_json = args.json or args.jsonl
+
     # CDP 模式：截取当前页面
     if args.cdp:
         asyncio.run(screenshot_ocr(
@@ -342,7 +525,8 @@ def main():
             target=args.target,
             exact=args.exact,
             click=args.click,
-            output_json=args.json,
+            output_json=output_json,
+            jsonl=args.jsonl,
             save_screenshot=args.save,
             wait_after_click=args.wait,
             expect_text=args.expect,
@@ -350,13 +534,23 @@ def main():
             quiet=args.quiet,
             region=args.region,
             near=args.near,
+            incremental=args.incremental,
+            wait_until=args.wait_until,
+            timeout=args.timeout,
+            fuzzy=args.fuzzy,
         ))
     elif args.source:
         source = args.source
         if source.startswith("http://") or source.startswith("https://"):
-            asyncio.run(screenshot_and_ocr_url(source, args.target, args.json, args.quiet))
+            asyncio.run(screenshot_and_ocr_url(source, args.target, output_json, args.quiet, args.jsonl))
+        elif is_batch_source(source):
+            # 批量模式：一个进程处理整个目录 / 列表，逐张输出 JSON Lines
+            failed = print_batch(source, args.target, args.exact, args.batch_size, args.workers, args.fuzzy)
+            sys.exit(1 if failed else 0)
         else:
-            asyncio.run(ocr_local_image(source, args.target, args.exact, args.json, args.quiet))
+            asyncio.run(ocr_local_image(
+                source, args.target, args.exact, output_json, args.quiet, args.jsonl, args.fuzzy,
+            ))
     else:
         parser.print_help()
         sys.exit(1)
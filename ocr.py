@@ -1,132 +1,505 @@
 """
 PaddleOCR 文字识别模块
 
-始终使用本地模型。
+默认自动探测 OCR Server（优先本地 Unix socket，其次 HTTP），可用时走 server，
+省掉每个进程加载模型的开销；server 不可用时回退本地模型。
+
+环境变量:
+    OCR_CLIENT_MODE    auto / local / server (默认 auto)
+    OCR_SERVER_SOCKET  OCR Server 的 Unix socket 路径 (默认 /tmp/ocr-server.sock)
+    OCR_SERVER_URL     OCR Server 的 HTTP 地址 (默认 http://127.0.0.1:8089)
+    OCR_DEVICE 等推理设备配置见 ocr_engine.py，OCR_CACHE_* 结果缓存配置见 ocr_cache.py
 """
 import os
+import sys
+import glob
 import json
-import base64
+import socket
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator
+
 import httpx
+import numpy as np
+
+import ocr_engine
+from ocr_cache import get_cache
+from ocr_engine import (  # 设备配置和区域解析等也从这里导出，兼容 from ocr import ...
+    REGION_PADDING, REGIONS, add_device_arguments, collect_timings, configure, configure_from_args,
+    create_ocr, crop_region, decode_image, find_item, find_items, get_pool, lookup, model_fingerprint,
+    parse_region, predict_jobs, region_rect, search_region, start_timings, timed,
+)
+from ocr_result import OCRResult
 
 OCR_SERVER_URL = os.environ.get("OCR_SERVER_URL", "http://127.0.0.1:8089")
-_ocr = None
-_use_api = False  # 固定使用本地
+OCR_SERVER_SOCKET = os.environ.get("OCR_SERVER_SOCKET", "/tmp/ocr-server.sock")
+OCR_CLIENT_MODE = os.environ.get("OCR_CLIENT_MODE", "auto")
+# 批量模式按后缀识别目录中的图片
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff"}
+# 增量识别：逐块比较前后两帧的块大小 (像素)，以及变化面积超过该比例时直接整图识别
+INCREMENTAL_TILE = 32
+INCREMENTAL_MAX_DIRTY = 0.5
+
+_use_api = None  # None 表示尚未探测
+_client = None
+
+
+def _socket_alive(path: str) -> bool:
+    """Unix socket 上有进程在监听（server 异常退出会留下 socket 文件，连接被拒绝）"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.3)
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def _get_client() -> httpx.Client:
+    """进程内复用的 server 客户端（保持连接），Unix socket 可连接时走 socket，否则走 OCR_SERVER_URL"""
+    global _client
+    if _client is None:
+        if OCR_SERVER_SOCKET and os.path.exists(OCR_SERVER_SOCKET) and _socket_alive(OCR_SERVER_SOCKET):
+            _client = httpx.Client(
+                transport=httpx.HTTPTransport(uds=OCR_SERVER_SOCKET),
+                base_url="http://ocr-server",
+                timeout=30.0,
+            )
+        else:
+            _client = httpx.Client(base_url=OCR_SERVER_URL, timeout=30.0)
+    return _client
 
 
 def _check_server():
-    """检查 OCR Server 是否可用"""
+    """检查 OCR Server 是否可用，每个进程只探测一次"""
     global _use_api
-    return False
-
-
-def _get_local_ocr():
-    """获取本地 OCR 实例"""
-    global _ocr
-    if _ocr is None:
-        os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = "True"
-        import paddle
-        if not paddle.device.is_compiled_with_cuda():
-            raise RuntimeError("CUDA is not available; GPU is required.")
-        device = paddle.device.get_device()
-        if not device.startswith("gpu"):
-            raise RuntimeError(f"GPU device required, got: {device}")
-        from paddleocr import PaddleOCR
-        _ocr = PaddleOCR(
-            use_doc_orientation_classify=False,
-            use_doc_unwarping=False,
-            use_textline_orientation=False,
-            device="gpu",
+    if _use_api is None:
+        if OCR_CLIENT_MODE == "local":
+            _use_api = False
+        elif OCR_CLIENT_MODE == "server":
+            _use_api = True
+        else:
+            try:
+                _use_api = _get_client().get("/health", timeout=0.3).status_code == 200
+            except httpx.HTTPError:
+                _use_api = False
+    return _use_api
+
+
+def _server_unavailable(error: Exception):
+    """server 调用出现连接错误：auto 模式下此后改用本地模型，server 模式直接报错"""
+    global _use_api
+    if OCR_CLIENT_MODE == "server":
+        raise error
+    _use_api = False
+
+
+def _image_bytes(image: str | bytes | np.ndarray) -> bytes:
+    """把路径 / 编码后的字节 / BGR 数组统一为编码后的图片字节"""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    with timed("read"):
+        if isinstance(image, np.ndarray):
+            import cv2
+            # 低压缩级别：只在本机传输，编码速度比体积重要
+            ok, buf = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            if not ok:
+                raise ValueError("Failed to encode image")
+            return buf.tobytes()
+        return Path(image).read_bytes()
+
+
+def _image_size(image: str | bytes | np.ndarray) -> tuple[int, int] | None:
+    """图片尺寸 (width, height)，只读文件头，不解码整张图"""
+    if isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    try:
+        from PIL import Image
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            import io
+            image = io.BytesIO(image)
+        with Image.open(image) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def _overlaps(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def dirty_tiles(prev: np.ndarray, img: np.ndarray, tile: int = INCREMENTAL_TILE) -> np.ndarray:
+    """逐块比较两帧，返回 (行数, 列数) 的 bool 数组，True 表示该块内有像素变化"""
+    h = img.shape[0]
+    # 按行展平后比较，通道维并入列，不必先对通道做 any
+    changed = prev.reshape(h, -1) != img.reshape(h, -1)
+    step = tile * (img.shape[2] if img.ndim == 3 else 1)
+    rows = np.logical_or.reduceat(changed, np.arange(0, h, tile), axis=0)
+    return np.logical_or.reduceat(rows, np.arange(0, changed.shape[1], step), axis=1)
+
+
+def dirty_rects(
+    tiles: np.ndarray,
+    img_size: tuple[int, int],
+    prev_items: OCRResult | list[dict],
+    tile: int = INCREMENTAL_TILE,
+) -> list[tuple[int, int, int, int]]:
+    """
+    把变化的块合并为需要重新识别的像素矩形。
+
+    相邻的变化块合为一个矩形，四周留 REGION_PADDING，再扩展到完整包住与之相交的旧文字框，
+    保证跨越边界的文字重新识别时不会被切断；扩展后相交的矩形继续合并。
+    """
+    w, h = img_size
+    rows, cols = tiles.shape
+    seen = np.zeros_like(tiles)
+    rects = []
+    for r, c in zip(*map(np.ndarray.tolist, np.nonzero(tiles))):
+        if seen[r, c]:
+            continue
+        # 8 连通分量的外接矩形
+        r1, c1, r2, c2 = r, c, r, c
+        stack = [(r, c)]
+        seen[r, c] = True
+        while stack:
+            y, x = stack.pop()
+            r1, c1, r2, c2 = min(r1, y), min(c1, x), max(r2, y), max(c2, x)
+            for ny in range(max(y - 1, 0), min(y + 2, rows)):
+                for nx in range(max(x - 1, 0), min(x + 2, cols)):
+                    if tiles[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        stack.append((ny, nx))
+        rects.append([
+            max(c1 * tile - REGION_PADDING, 0), max(r1 * tile - REGION_PADDING, 0),
+            min((c2 + 1) * tile + REGION_PADDING, w), min((r2 + 1) * tile + REGION_PADDING, h),
+        ])
+
+    boxes = OCRResult.from_items(prev_items).bboxes.tolist()
+    changed = True
+    while changed:
+        changed = False
+        for rect in rects:
+            for box in boxes:
+                if _overlaps(rect, box) and not (
+                    rect[0] <= box[0] and rect[1] <= box[1] and box[2] <= rect[2] and box[3] <= rect[3]
+                ):
+                    rect[:] = [min(rect[0], box[0]), min(rect[1], box[1]),
+                               max(rect[2], box[2]), max(rect[3], box[3])]
+                    changed = True
+        merged = []
+        for rect in rects:
+            for other in merged:
+                if _overlaps(rect, other):
+                    other[:] = [min(rect[0], other[0]), min(rect[1], other[1]),
+                                max(rect[2], other[2]), max(rect[3], other[3])]
+                    changed = True
+                    break
+            else:
+                merged.append(rect)
+        rects = merged
+    return [tuple(r) for r in rects]
+
+
+def recognize_incremental(
+    img_path: str | bytes | np.ndarray,
+    prev_image: str | bytes | np.ndarray,
+    prev_items: OCRResult | list[dict],
+) -> tuple[OCRResult, dict]:
+    """
+    基于上一帧的识别结果做增量识别，适合点击后验证这类大部分画面不变的场景。
+
+    逐块比较两帧，只对变化区域裁剪后重新识别，其余沿用 prev_items（必须是 prev_image
+    整图识别的结果）。尺寸不同或变化面积超过 INCREMENTAL_MAX_DIRTY 时退化为整图识别。
+
+    Returns:
+        (识别结果, 统计 {"dirty_ratio": 重新识别的像素比例, "regions": 重新识别的区域数,
+         "full": 是否整图识别})
+    """
+    img = decode_image(img_path)
+    prev = decode_image(prev_image)
+    h, w = img.shape[:2]
+
+    if prev.shape != img.shape:
+        return recognize(img), {"dirty_ratio": 1.0, "regions": 1, "full": True}
+
+    prev_items = OCRResult.from_items(prev_items)
+    rects = dirty_rects(dirty_tiles(prev, img), (w, h), prev_items)
+    dirty = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in rects) / (w * h)
+    if dirty > INCREMENTAL_MAX_DIRTY:
+        return recognize(img), {"dirty_ratio": 1.0, "regions": 1, "full": True}
+
+    stale = np.zeros(len(prev_items), dtype=bool)
+    for rect in rects:
+        stale |= prev_items.overlaps(rect)
+    parts = [prev_items[~stale]]
+    for x1, y1, x2, y2 in rects:
+        parts.append(recognize(img[y1:y2, x1:x2]).offset(x1, y1))
+    items = OCRResult.concat(parts, size=(w, h)).sorted()
+    return items, {"dirty_ratio": round(float(dirty), 4), "regions": len(rects), "full": False}
+
+
+def _post_api(path: str, image: str | bytes | np.ndarray, params: dict | None = None, retries: int = 3) -> dict:
+    """
+    上传图片原始字节到 server，503 时按 Retry-After 重试。
+
+    正在收集耗时（collect_timings）时让 server 附带各阶段耗时并合并进来，
+    往返时间中 server 各阶段以外的部分记为 transport（网络、HTTP、JSON 编解码、503 重试等待）。
+    """
+    data = _image_bytes(image)
+    timings = ocr_engine.current_timings()
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    if timings is not None:
+        params["timings"] = True
+    t0 = time.perf_counter()
+    for attempt in range(retries + 1):
+        resp = _get_client().post(
+            path,
+            content=data,
+            params=params,
+            headers={"content-type": "application/octet-stream"},
         )
-    return _ocr
-
-
-def _recognize_local(img_path: str) -> list[dict]:
-    """使用本地模型识别"""
-    ocr = _get_local_ocr()
-    result = list(ocr.predict(img_path))
-
-    items = []
-    for res in result:
-        if hasattr(res, "keys"):
-            boxes = res.get("rec_polys", res.get("dt_polys", []))
-            txts = res.get("rec_texts", [])
-            scores = res.get("rec_scores", [])
-
-            for box, txt, score in zip(boxes, txts, scores):
-                int_box = [(int(p[0]), int(p[1])) for p in box]
-                cx = sum(p[0] for p in int_box) // 4
-                cy = sum(p[1] for p in int_box) // 4
-                x1 = min(p[0] for p in int_box)
-                y1 = min(p[1] for p in int_box)
-                x2 = max(p[0] for p in int_box)
-                y2 = max(p[1] for p in int_box)
-
-                items.append({
-                    "text": txt,
-                    "box": int_box,
-                    "bbox": [x1, y1, x2, y2],
-                    "center": (cx, cy),
-                    "score": float(score),
-                })
-    return items
-
-
-def _recognize_api(img_path: str) -> list[dict]:
+        if resp.status_code != 503 or attempt == retries:
+            break
+        time.sleep(float(resp.headers.get("Retry-After", "1")))
+    resp.raise_for_status()
+    result = resp.json()
+    if timings is not None:
+        server = result.pop("timings", {})
+        for stage, ms in server.items():
+            ocr_engine.add_timing(stage, ms, timings)
+        ocr_engine.add_timing("transport", (time.perf_counter() - t0) * 1000 - sum(server.values()), timings)
+    return result
+
+
+def ensure_ready():
+    """提前探测 server，不用 server 时加载本地模型，让之后的识别耗时不含初始化开销"""
+    if not _check_server():
+        get_pool().fill()
+
+
+def _region_param(region: str | tuple | None) -> str | None:
+    """region 转成查询参数：元组 (x1, y1, x2, y2) 转为 "x1,y1,x2,y2"，server 只接受字符串"""
+    if isinstance(region, tuple):
+        return ",".join(map(str, region))
+    return region
+
+
+def _recognize_api(image: str | bytes | np.ndarray, region: str | tuple | None = None) -> OCRResult:
     """使用 API 识别"""
-    resp = httpx.post(
-        f"{OCR_SERVER_URL}/ocr",
-        json={"image": img_path, "is_path": True},
-        timeout=30.0,
-    )
-    data = resp.json()
+    data = _post_api("/ocr/upload", image, params={"region": _region_param(region), "text": False})
     if not data.get("ok"):
         raise RuntimeError(data.get("error", "OCR failed"))
-    # 转换 center 为 tuple
-    for item in data["items"]:
-        item["center"] = tuple(item["center"])
-    return data["items"]
+    return OCRResult.from_items(data["items"], size=data.get("size") and tuple(data["size"]))
 
 
-def recognize(img_path: str) -> list[dict]:
+def recognize(img_path: str | bytes | np.ndarray, region: str | tuple | None = None) -> OCRResult:
     """
     识别图片中的文字，返回文字位置和内容。
 
+    Args:
+        img_path: 图片路径、编码后的图片字节 (PNG/JPEG，例如 page.screenshot() 的返回值)
+            或 BGR 数组，后两者不经过磁盘
+        region: 只识别该区域 (见 parse_region)，推理前先裁剪，坐标仍是原图坐标，
+            只返回中心点落在区域内的文字
+
     Returns:
-        list of dict: [{"text": str, "box": [...], "center": (x,y), "score": float}, ...]
+        OCRResult: 列式存储的结果，按阅读顺序（中心点 y, x）排序。兼容 list of dict 用法，下标访问和迭代得到
+            {"text": str, "box": [[x, y], ...], "bbox": [x1, y1, x2, y2], "center": [x, y], "score": float}，
+            需要真正的 list（例如 json.dumps）时用 .to_items()
+
+    各阶段耗时用 collect_timings() 收集（走 server 时包含 server 端的阶段）:
+
+        with collect_timings() as timings:
+            items = recognize(screenshot)
+        print(timings)  # {'read': 0.1, 'cache': 0.4, 'decode': 9.8, 'predict': 412.0, ...} (ms)
     """
     if _check_server():
-        return _recognize_api(img_path)
-    return _recognize_local(img_path)
+        try:
+            return _recognize_api(img_path, region)
+        except httpx.TransportError as e:
+            _server_unavailable(e)
+    return ocr_engine.recognize(img_path, region)
+
+
+def report_timings(timings: dict):
+    """进程结束时把收集到的各阶段耗时 (ms) 和总耗时输出到 stderr，一行 JSON"""
+    import atexit
+    t0 = time.perf_counter()
+
+    def report():
+        record = {stage: round(ms, 1) for stage, ms in timings.items()}
+        record["total"] = round((time.perf_counter() - t0) * 1000, 1)
+        print(json.dumps({"timings": record}), file=sys.stderr)
+
+    atexit.register(report)
+
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """可选依赖 orjson，序列化比标准库 json 快数倍，没装时返回 None"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def write_jsonl(record) -> None:
+    """向 stdout 输出一行紧凑 JSON 并立即 flush，装了 orjson 时用 orjson 序列化"""
+    orjson = _orjson()
+    if orjson is not None:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        sys.stdout.buffer.flush()
+    else:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        sys.stdout.flush()
+
+
+def is_batch_source(source: str) -> bool:
+    """目录、glob 通配符或 "-"（从 stdin 读路径）都按批量模式处理"""
+    return source == "-" or glob.has_magic(source) or Path(source).is_dir()
+
+
+def iter_image_paths(source: str) -> Iterator[str]:
+    """
+    展开批量输入：目录（递归查找 IMAGE_SUFFIXES 图片）、glob 通配符，
+    或 "-" 从 stdin 逐行读取路径（边读边产出，不需要等列表读完）
+    """
+    if source == "-":
+        for line in sys.stdin:
+            if line := line.strip():
+                yield line
+    elif glob.has_magic(source):
+        yield from sorted(glob.glob(source, recursive=True))
+    else:
+        yield from sorted(
+            str(p) for p in Path(source).rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES and p.is_file()
+        )
+
+
+def recognize_many(
+    paths: Iterable[str],
+    batch_size: int = 8,
+    workers: int = 4,
+) -> Iterator[tuple[str, OCRResult | None, Exception | None]]:
+    """
+    批量识别，按输入顺序逐张产出 (path, items, error)，单张失败不影响其他图片。
+
+    读文件、查缓存和解码在线程池中并行，本地模型每 batch_size 张合并为一次 predict，
+    推理期间线程池继续预取后面的图片；连接 server 时直接并发上传，由 server 合批。
+    预取窗口有上限，输入再多内存占用也是固定的。
+    """
+    use_api = _check_server()
+
+    def load(path):
+        if use_api:
+            return recognize(path), None
+        return lookup(path)
+
+    paths = iter(paths)
+    window = batch_size + 2 * workers
+    pending = deque()
+    with ThreadPoolExecutor(workers) as pool:
+        def fill():
+            while len(pending) < window:
+                path = next(paths, None)
+                if path is None:
+                    return
+                pending.append((path, pool.submit(load, path)))
+
+        fill()
+        while pending:
+            batch = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+            fill()
+
+            results, todo = [], []
+            for path, future in batch:
+                try:
+                    items, job = future.result()
+                except Exception as e:
+                    results.append([path, None, e])
+                    continue
+                results.append([path, items, None])
+                if job is not None:
+                    todo.append((results[-1], job))
+
+            if todo:
+                try:
+                    outputs = predict_jobs([job for _, job in todo])
+                except Exception as e:
+                    if len(todo) == 1:
+                        todo[0][0][2] = e
+                    else:
+                        # 一张图让整批 predict 失败：逐张重试，只有出错的图片失败
+                        for result, job in todo:
+                            try:
+                                result[1] = predict_jobs([job])[0]
+                            except Exception as e:
+                                result[2] = e
+                else:
+                    for (result, _), items in zip(todo, outputs):
+                        result[1] = items
+
+            for path, items, error in results:
+                yield path, items, error
+
+
+def print_batch(
+    source: str,
+    target: str | None = None,
+    exact: bool = False,
+    batch_size: int = 8,
+    workers: int = 4,
+    fuzzy: float = 0.0,
+) -> int:
+    """
+    批量模式 CLI 输出：每张图片识别完立即输出一行 JSON，返回失败的张数。
+
+    每行为 {"path", "items"}，指定 target 时为 {"path", "item"}（未找到为 null），
+    失败时为 {"path", "error"}。
+    """
+    failed = 0
+    for path, items, error in recognize_many(iter_image_paths(source), batch_size, workers):
+        if error is not None:
+            failed += 1
+            record = {"path": path, "error": f"{type(error).__name__}: {error}"}
+        elif target:
+            record = {"path": path, "item": find_text_item(path, target, exact=exact, items=items, fuzzy=fuzzy)}
+        else:
+            record = {"path": path, "items": items.to_items()}
+        write_jsonl(record)
+    return failed
 
 
 def find_text(
-    img_path: str,
+    img_path: str | bytes | np.ndarray,
     target: str,
     exact: bool = False,
-    all_matches: bool = False
+    all_matches: bool = False,
+    items: OCRResult | list[dict] | None = None,
+    fuzzy: float = 0.0,
 ) -> tuple[int, int] | list[tuple[int, int]] | None:
     """
     查找指定文字的中心点坐标。
 
     Args:
-        img_path: 图片路径
+        img_path: 图片路径、图片字节或 BGR 数组，同 recognize()
         target: 要查找的文字
-        exact: True 时精确匹配，False 时包含匹配
+        exact: True 时精确匹配，False 时包含匹配（忽略大小写和全角/半角）
         all_matches: True 时返回所有匹配，False 时返回第一个
+        items: 已有的 recognize() 结果，传入时不再重复识别
+        fuzzy: 大于 0 时近似匹配，允许的编辑距离为 目标长度 * fuzzy（见 ocr_search.py）
 
     Returns:
         (x, y) 中心坐标，或坐标列表，未找到返回 None
     """
-    items = recognize(img_path)
-    matches = []
-
-    for item in items:
-        if exact:
-            if item["text"] == target:
-                matches.append(item["center"])
-        else:
-            if target.lower() in item["text"].lower():
-                matches.append(item["center"])
+    items = OCRResult.from_items(recognize(img_path) if items is None else items)
+    centers = items.centers.tolist()
+    matches = [tuple(centers[i]) for i in items.text_index.search(target, exact=exact, fuzzy=fuzzy)]
 
     if not matches:
         return None
@@ -137,140 +510,136 @@ def find_text(
 
 
 def find_text_item(
-    img_path: str,
+    img_path: str | bytes | np.ndarray,
     target: str,
     exact: bool = False,
-    region: str | None = None,
+    region: str | tuple | None = None,
     near: str | None = None,
     img_size: tuple[int, int] | None = None,
+    items: OCRResult | list[dict] | None = None,
+    fuzzy: float = 0.0,
 ) -> dict | None:
     """
     查找指定文字，返回完整信息。
 
     Args:
-        img_path: 图片路径
+        img_path: 图片路径、图片字节或 BGR 数组，同 recognize()
         target: 要查找的文字
-        exact: True 时精确匹配，False 时包含匹配
-        region: 位置过滤 - "top", "bottom", "left", "right", "center"
+        exact: True 时精确匹配，False 时包含匹配（忽略大小写和全角/半角）
+        region: 位置过滤 - "top", "bottom", "left", "right", "center"、"x1,y1,x2,y2" 或同样含义的元组
+            (像素或比例)，未传 items 时只识别该区域
         near: 上下文匹配 - 查找靠近此文字的目标
         img_size: 图片尺寸 (width, height)，用于 region 计算
+        items: 已有的 recognize() 结果，传入时不再重复识别；
+            未找到时调用方可以直接用它列出所有文字，整个流程只识别一次
+        fuzzy: 大于 0 时近似匹配，容忍 0/O、1/l 之类的识别误差，
+            允许的编辑距离为 目标长度 * fuzzy（例如 0.2）
 
     Returns:
         dict with text, box, bbox, center, score，未找到返回 None
     """
     # 使用 API 时可以直接调用 /find 端点
-    if _check_server():
-        resp = httpx.post(
-            f"{OCR_SERVER_URL}/find",
-            json={
-                "image": img_path,
-                "is_path": True,
-                "target": target,
-                "exact": exact,
-                "region": region,
-                "near": near,
-            },
-            timeout=30.0,
-        )
-        data = resp.json()
-        if not data.get("ok"):
-            return None
-        item = data["item"]
-        item["center"] = tuple(item["center"])
-        return item
-
-    # 本地模式
-    items = recognize(img_path)
-
-    # 获取图片尺寸用于 region 计算
-    if region and not img_size:
+    if items is None and _check_server():
         try:
-            from PIL import Image
-            with Image.open(img_path) as img:
-                img_size = img.size
-        except:
-            pass
-
-    # 如果有 near 参数，先找到参考文字的位置
-    near_center = None
-    if near:
-        for item in items:
-            if near.lower() in item["text"].lower():
-                near_center = item["center"]
-                break
-
-    # 过滤和匹配
-    candidates = []
-    for item in items:
-        if exact:
-            if item["text"] != target:
-                continue
+            data = _post_api(
+                "/find/upload",
+                img_path,
+                params={"target": target, "exact": exact, "region": _region_param(region), "near": near,
+                        "fuzzy": fuzzy or None},
+            )
+        except httpx.TransportError as e:
+            _server_unavailable(e)
         else:
-            if target.lower() not in item["text"].lower():
-                continue
-
-        if region and img_size:
-            cx, cy = item["center"]
-            w, h = img_size
-
-            if region == "top" and cy > h * 0.4:
-                continue
-            elif region == "bottom" and cy < h * 0.6:
-                continue
-            elif region == "left" and cx > w * 0.4:
-                continue
-            elif region == "right" and cx < w * 0.6:
-                continue
-            elif region == "center":
-                if not (w * 0.3 < cx < w * 0.7 and h * 0.3 < cy < h * 0.7):
-                    continue
+            if not data.get("ok"):
+                return None
+            return data["item"]
 
-        candidates.append(item)
+    return find_text_items(img_path, [target], exact, region, near, img_size, items, fuzzy)[target]
 
-    if not candidates:
-        return None
 
-    if near_center and len(candidates) > 1:
-        def distance(item):
-            cx, cy = item["center"]
-            nx, ny = near_center
-            return (cx - nx) ** 2 + (cy - ny) ** 2
-        candidates.sort(key=distance)
+def find_text_items(
+    img_path: str | bytes | np.ndarray,
+    targets: list[str],
+    exact: bool = False,
+    region: str | tuple | None = None,
+    near: str | None = None,
+    img_size: tuple[int, int] | None = None,
+    items: OCRResult | list[dict] | None = None,
+    fuzzy: float = 0.0,
+) -> dict[str, dict | None]:
+    """
+    一次识别查找多个文字（例如一个页面上的多个按钮），返回 {目标: 命中的一项或 None}。
+
+    参数同 find_text_item；所有目标共用一次识别和同一份文字索引。
+    """
+    if items is None:
+        items = recognize(img_path, region=search_region(region, near))
 
-    return candidates[0]
+    items = OCRResult.from_items(items)
+    # 只有 region 且结果里没有图片尺寸时才需要读图片头
+    if region and not (img_size or items.size):
+        img_size = _image_size(img_path)
+    return find_items(items, targets, exact=exact, region=region, near=near, img_size=img_size, fuzzy=fuzzy)
 
 
 if __name__ == "__main__":
     import argparse
-    import sys
 
     parser = argparse.ArgumentParser(description="PaddleOCR 文字识别工具")
-    parser.add_argument("image", nargs="?", default="t1.jpg", help="要识别的图片路径")
+    parser.add_argument("image", nargs="?", default="t1.jpg",
+                        help="要识别的图片路径；目录、通配符或 - (从 stdin 逐行读路径) 为批量模式，输出 JSON Lines")
     parser.add_argument("-t", "--target", help="查找特定文字")
     parser.add_argument("-e", "--exact", action="store_true", help="精确匹配")
+    parser.add_argument("--fuzzy", type=float, default=0.0, metavar="RATIO",
+                        help="近似匹配，容忍 0/O、1/l 等识别误差，允许的编辑距离 = 目标长度 * RATIO (例如 0.2)")
     parser.add_argument("-j", "--json", action="store_true", help="JSON 输出")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="JSON Lines 输出：每个文字一行紧凑 JSON，边识别边输出 (装了 orjson 时更快)")
     parser.add_argument("-p", "--with-position", action="store_true", help="输出包含坐标信息")
-    parser.add_argument("--local", action="store_true", help="强制使用本地模型")
+    parser.add_argument("--local", action="store_true", help="强制使用本地模型，不连接 OCR Server")
+    parser.add_argument("--batch-size", type=int, default=8, help="批量模式每次合并推理的图片数 (默认: 8)")
+    parser.add_argument("--workers", type=int, default=4, help="批量模式读取解码线程数 (默认: 4)")
+    parser.add_argument("--cache-stats", action="store_true", help="结束时输出缓存命中统计 (stderr)")
+    parser.add_argument("--timings", action="store_true", help="结束时输出各阶段耗时 ms (stderr)")
+    add_device_arguments(parser)
     args = parser.parse_args()
+    configure_from_args(args)
+
+    if args.cache_stats and get_cache():
+        import atexit
+        cache = get_cache()
+        atexit.register(lambda: print(json.dumps(cache.stats()), file=sys.stderr))
+
+    if args.timings:
+        report_timings(start_timings())
 
     if args.local:
         _use_api = False
 
+    if is_batch_source(args.image):
+        failed = print_batch(args.image, args.target, args.exact, args.batch_size, args.workers, args.fuzzy)
+        sys.exit(1 if failed else 0)
+
     items = recognize(args.image)
 
     if args.target:
-        item = find_text_item(args.image, args.target, exact=args.exact)
+        item = find_text_item(args.image, args.target, exact=args.exact, items=items, fuzzy=args.fuzzy)
         if item:
-            if args.json:
+            if args.jsonl:
+                write_jsonl(item)
+            elif args.json:
                 print(json.dumps(item, ensure_ascii=False))
             else:
-                print(f"找到 \"{item['text']}\" 点击坐标: {item['center']}")
+                print(f"找到 \"{item['text']}\" 点击坐标: {tuple(item['center'])}")
         else:
             print(f"未找到 \"{args.target}\"", file=sys.stderr)
             sys.exit(1)
     else:
-        if args.json:
-            print(json.dumps(items, ensure_ascii=False, indent=2))
+        if args.jsonl:
+            for item in items:
+                write_jsonl(item)
+        elif args.json:
+            print(json.dumps(items.to_items(), ensure_ascii=False, indent=2))
         elif args.with_position:
             for item in items:
                 bbox = item["bbox"]
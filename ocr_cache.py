@@ -0,0 +1,124 @@
+"""
+OCR 结果缓存
+
+以图片字节的哈希 + 模型配置指纹为 key，缓存 predict 的结果（文字、多边形、分数、图片尺寸），
+ocr.py 和 ocr_server.py 共用。内存中为 OCRResult 的 LRU，可选以 JSON 落盘到目录供多个 CLI 进程复用。
+
+环境变量:
+    OCR_CACHE_ENTRIES  内存缓存最大条目数 (默认 128，0 表示禁用缓存)
+    OCR_CACHE_MB       内存缓存最大占用 MB (默认 64)
+    OCR_CACHE_DIR      落盘目录 (默认不落盘)
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from ocr_result import OCRResult
+
+OCR_CACHE_ENTRIES = int(os.environ.get("OCR_CACHE_ENTRIES", "128"))
+OCR_CACHE_MB = float(os.environ.get("OCR_CACHE_MB", "64"))
+OCR_CACHE_DIR = os.environ.get("OCR_CACHE_DIR") or None
+
+_cache = None
+
+
+def compact_result(res, size: tuple[int, int]) -> OCRResult:
+    """把单张图片的 predict 结果转换为列式的 OCRResult，size 为图片尺寸"""
+    return OCRResult.from_predict(res, (int(size[0]), int(size[1])))
+
+
+class OCRCache:
+    """线程安全的 LRU 缓存，按条目数和近似字节数双重限制"""
+
+    def __init__(self, max_entries: int, max_bytes: int, disk_dir: str | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._data: OrderedDict[str, tuple[OCRResult, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data: bytes, fingerprint: str) -> str:
+        h = hashlib.blake2b(data, digest_size=16)
+        h.update(fingerprint.encode())
+        return h.hexdigest()
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> OCRResult | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        if self.disk_dir:
+            try:
+                value = OCRResult.from_raw(json.loads(self._disk_path(key).read_bytes()))
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            else:
+                self._put_memory(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: OCRResult):
+        self._put_memory(key, value)
+        if self.disk_dir:
+            raw = json.dumps(value.to_raw(), ensure_ascii=False, separators=(",", ":")).encode()
+            path = self._disk_path(key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(raw)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+
+    def _put_memory(self, key: str, value: OCRResult):
+        size = value.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+def get_cache() -> OCRCache | None:
+    """按环境变量创建的进程级缓存，OCR_CACHE_ENTRIES=0 时返回 None"""
+    global _cache
+    if _cache is None and OCR_CACHE_ENTRIES > 0:
+        _cache = OCRCache(OCR_CACHE_ENTRIES, int(OCR_CACHE_MB * 1024 * 1024), OCR_CACHE_DIR)
+    return _cache
@@ -0,0 +1,649 @@
+"""
+识别引擎：ocr.py（CLI / Python 库）和 ocr_server.py（HTTP）共用的一层
+
+- 推理设备配置、PaddleOCR 实例创建和模型池
+- 查缓存 → 解码 → 按区域裁剪 → predict（可多张合批）→ 还原坐标、按阅读顺序排序 → 写缓存
+- 区域解析和文字匹配（region / near，文字检索见 ocr_search.py）
+- 结果拼接为文本（按行聚类，可选按栏拆分）
+- 各阶段耗时：进程级回调（server 的 /metrics）和按上下文收集（--timings、响应中的 timings）
+
+缓存、合批、后处理之类的优化只在这里实现一次，本地识别和 server 返回的结果完全一致。
+
+环境变量:
+    OCR_DEVICE         推理设备 auto / cpu / gpu / gpu:N (默认 auto，有 GPU 用 GPU)
+    OCR_CPU_THREADS    CPU 推理线程数 (默认 0，使用 paddle 默认值)
+    OCR_ENABLE_MKLDNN  CPU 推理是否启用 MKL-DNN (默认 1)
+    OCR_PRECISION      推理精度 fp32 / fp16 (默认 fp32)
+    OCR_CACHE_*        识别结果缓存配置见 ocr_cache.py
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+
+from ocr_cache import compact_result, get_cache
+from ocr_result import OCRResult
+
+OCR_DEVICE = os.environ.get("OCR_DEVICE", "auto")
+OCR_CPU_THREADS = int(os.environ.get("OCR_CPU_THREADS", "0"))
+OCR_ENABLE_MKLDNN = os.environ.get("OCR_ENABLE_MKLDNN", "1").lower() not in ("0", "false", "no")
+OCR_PRECISION = os.environ.get("OCR_PRECISION", "fp32")
+
+# 命名区域对应的矩形 (x1, y1, x2, y2)，以图片宽高的比例表示
+REGIONS = {
+    "top": (0.0, 0.0, 1.0, 0.4),
+    "bottom": (0.0, 0.6, 1.0, 1.0),
+    "left": (0.0, 0.0, 0.4, 1.0),
+    "right": (0.6, 0.0, 1.0, 1.0),
+    "center": (0.3, 0.3, 0.7, 0.7),
+}
+# 裁剪时向外多留的像素，避免中心在区域内、但跨越边界的文字被切断
+REGION_PADDING = 16
+
+
+# ------------------------------------------------------------ 阶段耗时
+#
+# 阶段:
+#     read          读取图片字节（读文件 / 数组编码）
+#     cache         计算缓存 key 并查缓存
+#     decode        解码图片、按区域裁剪
+#     predict       模型推理（检测 + 识别，PaddleOCR 内部不分开计时）
+#     predict_cold  实例创建后的第一次推理（含模型初始化、显存分配等一次性开销）
+#     postprocess   转为 OCRResult、排序、还原坐标、写缓存
+#     build_text    拼接 text 字段
+#     match         文字匹配 (find)
+# 调用方还会记录自己的阶段，例如 main.py 的 screenshot、server 的 queue / serialize。
+
+# 阶段耗时回调 fn(stage, seconds)
+_stage_hooks: list = []
+# 当前上下文收集耗时的 dict {阶段: 累计毫秒}，None 表示不收集
+_timings: ContextVar[dict | None] = ContextVar("ocr_timings", default=None)
+
+
+def add_stage_hook(fn):
+    """注册阶段耗时回调（进程级，server 的 /metrics 用），在执行该阶段的线程中调用"""
+    _stage_hooks.append(fn)
+
+
+@contextmanager
+def collect_timings(timings: dict | None = None):
+    """
+    收集 with 块内各阶段的耗时，yield {阶段: 毫秒}，同一阶段多次执行时累加。
+
+    按 contextvars 传递：同一线程、asyncio 任务和 asyncio.to_thread 内有效，
+    线程池中的代码需要自己再包一层。
+
+        with collect_timings() as timings:
+            recognize(screenshot)
+        print(timings)  # {'read': 0.1, 'cache': 0.4, 'decode': 9.8, 'predict': 412.0, ...}
+    """
+    timings = {} if timings is None else timings
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def start_timings() -> dict:
+    """从现在起在当前上下文收集耗时直到进程结束（CLI 的 --timings 用），返回收集用的 dict"""
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def current_timings() -> dict | None:
+    """当前上下文正在收集的 dict，没有时为 None"""
+    return _timings.get()
+
+
+def add_timing(stage: str, ms: float, timings: dict | None = None):
+    """把一段在别处测得的耗时累加到 timings（默认当前上下文）"""
+    timings = _timings.get() if timings is None else timings
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + ms
+
+
+@contextmanager
+def timed(stage: str):
+    """记录 with 块的耗时，交给已注册的回调和当前上下文的收集器；两者都没有时不计时"""
+    timings = _timings.get()
+    if not _stage_hooks and timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        for fn in _stage_hooks:
+            fn(stage, elapsed)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed * 1000
+
+
+# ------------------------------------------------------------ 模型
+
+def configure(
+    device: str | None = None,
+    cpu_threads: int | None = None,
+    enable_mkldnn: bool | None = None,
+    precision: str | None = None,
+):
+    """修改推理设备配置（覆盖环境变量），已创建的模型实例会在下次使用时按新配置重建"""
+    global OCR_DEVICE, OCR_CPU_THREADS, OCR_ENABLE_MKLDNN, OCR_PRECISION
+    if device is not None:
+        OCR_DEVICE = device
+    if cpu_threads is not None:
+        OCR_CPU_THREADS = cpu_threads
+    if enable_mkldnn is not None:
+        OCR_ENABLE_MKLDNN = enable_mkldnn
+    if precision is not None:
+        OCR_PRECISION = precision
+    _pool.clear()
+
+
+def resolve_device(device: str) -> str:
+    """把 auto / cpu / gpu / gpu:N 解析为实际设备，显式要求 GPU 但不可用时报错"""
+    import paddle
+    has_gpu = paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+
+    if device == "auto":
+        return "gpu" if has_gpu else "cpu"
+    if device == "cpu":
+        return "cpu"
+    if device.startswith("gpu"):
+        if not paddle.device.is_compiled_with_cuda():
+            raise RuntimeError("CUDA is not available; GPU is required.")
+        if not has_gpu:
+            raise RuntimeError(f"GPU device required, got: {paddle.device.get_device()}")
+        return device
+    raise ValueError(f"Unknown device: {device} (expected auto / cpu / gpu)")
+
+
+def create_ocr(
+    device: str | None = None,
+    cpu_threads: int | None = None,
+    enable_mkldnn: bool | None = None,
+    precision: str | None = None,
+):
+    """按设备配置创建 PaddleOCR 实例，未传的参数使用模块配置"""
+    os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = "True"
+    device = resolve_device(device or OCR_DEVICE)
+    cpu_threads = OCR_CPU_THREADS if cpu_threads is None else cpu_threads
+    enable_mkldnn = OCR_ENABLE_MKLDNN if enable_mkldnn is None else enable_mkldnn
+
+    kwargs = {"precision": precision or OCR_PRECISION}
+    if device == "cpu":
+        kwargs["enable_mkldnn"] = enable_mkldnn
+        if cpu_threads > 0:
+            kwargs["cpu_threads"] = cpu_threads
+
+    from paddleocr import PaddleOCR
+    return PaddleOCR(
+        use_doc_orientation_classify=False,
+        use_doc_unwarping=False,
+        use_textline_orientation=False,
+        device=device,
+        **kwargs,
+    )
+
+
+def add_device_arguments(parser):
+    """给 CLI 添加推理设备相关参数"""
+    parser.add_argument("--device", choices=["auto", "cpu", "gpu"],
+                        help="推理设备 (默认: $OCR_DEVICE 或 auto)")
+    parser.add_argument("--cpu-threads", type=int, metavar="N", help="CPU 推理线程数")
+    parser.add_argument("--no-mkldnn", action="store_true", help="CPU 推理禁用 MKL-DNN")
+    parser.add_argument("--precision", choices=["fp32", "fp16"], help="推理精度")
+
+
+def configure_from_args(args):
+    """应用 add_device_arguments 添加的参数"""
+    configure(
+        device=args.device,
+        cpu_threads=args.cpu_threads,
+        enable_mkldnn=False if args.no_mkldnn else None,
+        precision=args.precision,
+    )
+
+
+def device_env() -> dict[str, str]:
+    """当前推理设备配置对应的环境变量，传给子进程（多进程 server、基准测试）使其配置一致"""
+    return {
+        "OCR_DEVICE": OCR_DEVICE,
+        "OCR_CPU_THREADS": str(OCR_CPU_THREADS),
+        "OCR_ENABLE_MKLDNN": "1" if OCR_ENABLE_MKLDNN else "0",
+        "OCR_PRECISION": OCR_PRECISION,
+    }
+
+
+class ModelPool:
+    """
+    PaddleOCR 实例池。实例不是线程安全的，每次 predict 借用一个独立实例。
+
+    按需创建，最多 size 个，全部借出时等待归还；CLI 用默认的 1 个，
+    server 按推理线程数设置 size 并在启动时 fill() 预加载。
+    """
+
+    def __init__(self, size: int = 1):
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        self._created = 0
+        self._warm = set()  # 已完成过 predict 的实例 id
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def fill(self):
+        """预创建实例直到 size 个"""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+                generation = self._generation
+            self._give_back(self._create(), generation)
+
+    def _create(self):
+        try:
+            return create_ocr()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _give_back(self, ocr, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._idle.put(ocr)
+
+    @contextmanager
+    def borrow(self):
+        """借出一个实例，用完归还；空闲实例不够且未达上限时新建一个"""
+        with self._lock:
+            generation = self._generation
+            create = self._idle.empty() and self._created < self.size
+            if create:
+                self._created += 1
+        ocr = self._create() if create else self._idle.get()
+        try:
+            yield ocr
+        finally:
+            self._give_back(ocr, generation)
+
+    def predict(self, ocr, imgs: list[np.ndarray]) -> list:
+        """用借出的实例 predict，按实例是否已预热分别计时"""
+        warm = id(ocr) in self._warm
+        with timed("predict" if warm else "predict_cold"):
+            results = list(ocr.predict(imgs))
+        if not warm:
+            with self._lock:
+                self._warm.add(id(ocr))
+        return results
+
+    def warm_up(self, imgs: list[np.ndarray], rounds: int = 1):
+        """
+        创建全部实例，并让每个实例逐张 predict 一遍 imgs（重复 rounds 轮），
+        把 kernel 编译、内存 / 显存分配、按输入尺寸的优化等一次性开销提前付掉。
+
+        同时借出全部实例并行预热，保证每个实例都被预热到；期间到来的请求等待实例归还。
+        """
+        self.fill()
+        with ExitStack() as stack:
+            ocrs = [stack.enter_context(self.borrow()) for _ in range(self.size)]
+
+            def run(ocr):
+                for _ in range(rounds):
+                    for img in imgs:
+                        self.predict(ocr, [img])
+
+            with ThreadPoolExecutor(max_workers=len(ocrs), thread_name_prefix="ocr-warmup") as executor:
+                list(executor.map(run, ocrs))
+
+    def stats(self) -> dict:
+        """实例数：上限、已创建、空闲、已预热（完成过至少一次 predict）"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "idle": self._idle.qsize(),
+                "warm": len(self._warm),
+            }
+
+    def clear(self):
+        """丢弃已创建的实例（配置变化后），借出中的实例归还时也会被丢弃"""
+        with self._lock:
+            self._generation += 1
+            self._created = 0
+            self._warm = set()
+            self._idle = queue.Queue()
+
+
+_pool = ModelPool()
+
+
+def get_pool() -> ModelPool:
+    """进程级模型池"""
+    return _pool
+
+
+@lru_cache(maxsize=None)
+def _paddleocr_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+    try:
+        return version("paddleocr")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def model_fingerprint() -> str:
+    """模型配置指纹，作为结果缓存 key 的一部分，配置变化后旧结果自动失效"""
+    return f"paddleocr={_paddleocr_version()};device={OCR_DEVICE};precision={OCR_PRECISION}"
+
+
+# ------------------------------------------------------------ 区域
+
+def parse_region(region: str | tuple) -> tuple[float, float, float, float]:
+    """
+    解析 region：命名区域 (top/bottom/left/right/center) 或 "x1,y1,x2,y2"。
+
+    四个值都在 [0, 1] 内时按图片宽高的比例解释，否则按像素解释。
+    """
+    if isinstance(region, str):
+        if region in REGIONS:
+            return REGIONS[region]
+        try:
+            rect = tuple(float(v) for v in region.split(","))
+        except ValueError:
+            rect = ()
+    else:
+        rect = tuple(float(v) for v in region)
+    if len(rect) != 4 or rect[2] <= rect[0] or rect[3] <= rect[1]:
+        raise ValueError(
+            f"Invalid region: {region!r} (expected {'/'.join(REGIONS)} or x1,y1,x2,y2)"
+        )
+    return rect
+
+
+def region_rect(region: str | tuple, img_size: tuple[int, int], padding: int = 0) -> tuple[int, int, int, int]:
+    """把 region 换算为图片内的像素矩形 (x1, y1, x2, y2)，可向外扩 padding 像素"""
+    x1, y1, x2, y2 = parse_region(region)
+    w, h = img_size
+    if max(x1, y1, x2, y2) <= 1:
+        x1, y1, x2, y2 = x1 * w, y1 * h, x2 * w, y2 * h
+    return (
+        max(0, int(x1) - padding),
+        max(0, int(y1) - padding),
+        min(w, int(round(x2)) + padding),
+        min(h, int(round(y2)) + padding),
+    )
+
+
+def crop_region(img: np.ndarray, region: str | tuple) -> tuple[np.ndarray, tuple[int, int], tuple[int, int, int, int]]:
+    """
+    裁剪出 region（含 REGION_PADDING）供推理。
+
+    Returns:
+        (裁剪后的数组, 裁剪区域左上角偏移 (dx, dy), region 像素矩形)
+    """
+    size = (img.shape[1], img.shape[0])
+    rect = region_rect(region, size)
+    x1, y1, x2, y2 = region_rect(region, size, padding=REGION_PADDING)
+    return img[y1:y2, x1:x2], (x1, y1), rect
+
+
+def search_region(region: str | None, near: str | None) -> str | None:
+    """查找时需要裁剪后再识别的区域；有 near 时参考文字可能在区域外，识别整张图"""
+    return None if near else region
+
+
+# ------------------------------------------------------------ 识别
+
+def warmup_image(width: int, height: int) -> np.ndarray:
+    """预热用的合成截图：白底上几行不同字号的黑色英文，检测和识别两个模型都会跑到"""
+    import cv2
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    lines = ["Sign in to continue", "Settings  Profile  Logout", "Submit order 12345", "Search results"]
+    y = 0
+    for i in range(height // 40):
+        scale = 0.6 + 0.4 * (i % 4)
+        y += int(40 * scale)
+        if y >= height - 10:
+            break
+        cv2.putText(img, lines[i % len(lines)], (20 + 40 * (i % 5), y), cv2.FONT_HERSHEY_SIMPLEX,
+                    scale, (0, 0, 0), max(1, round(scale * 1.5)), cv2.LINE_AA)
+    return img
+
+
+def decode_image(image: str | bytes | np.ndarray) -> np.ndarray:
+    """把路径 / 编码后的字节解码为 BGR 数组（与 PaddleOCR 读文件的格式一致）"""
+    if isinstance(image, np.ndarray):
+        return image
+    import cv2
+    if not isinstance(image, (bytes, bytearray, memoryview)):
+        image = Path(image).read_bytes()
+    # 空缓冲区 cv2.imdecode 会抛 cv2.error 而不是返回 None
+    if not len(image):
+        raise ValueError("Invalid image data")
+    img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Invalid image data")
+    return img
+
+
+def predict_images(imgs: list[np.ndarray]) -> list[OCRResult]:
+    """借一个模型实例，一次 predict 识别多张 BGR 图片，按输入顺序返回按阅读顺序排好的结果"""
+    with _pool.borrow() as ocr:
+        results = _pool.predict(ocr, imgs)
+    with timed("postprocess"):
+        return [compact_result(res, (img.shape[1], img.shape[0])).sorted() for res, img in zip(results, imgs)]
+
+
+def lookup(image: str | bytes | np.ndarray, region: str | tuple | None = None) -> tuple[OCRResult | None, tuple | None]:
+    """
+    识别的前半段：查缓存，未命中时解码并按 region 裁剪。
+
+    Returns:
+        命中 (结果, None)，未命中 (None, job)；多个 job 交给 predict_jobs 合并为一次 predict
+    """
+    cache = get_cache()
+    fingerprint = model_fingerprint()
+    if isinstance(image, np.ndarray):
+        img = np.ascontiguousarray(image)
+        data = img
+        fingerprint += f";shape={img.shape}"
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        img = None
+        data = image
+    else:
+        img = None
+        with timed("read"):
+            data = Path(image).read_bytes()
+    if region:
+        fingerprint += f";region={region}"
+
+    with timed("cache"):
+        key = cache.key(data, fingerprint) if cache else None
+        result = cache.get(key) if cache else None
+    if result is not None:
+        return result, None
+
+    with timed("decode"):
+        if img is None:
+            img = decode_image(data)
+        size = (img.shape[1], img.shape[0])
+        if region:
+            crop, offset, rect = crop_region(img, region)
+        else:
+            crop, offset, rect = img, (0, 0), None
+    return None, (key, crop, offset, rect, size)
+
+
+def predict_jobs(jobs: list[tuple]) -> list[OCRResult]:
+    """
+    识别的后半段：一次 predict 识别 lookup 返回的多个 job，
+    坐标平移回原图，有 region 时只保留中心点在区域内的文字，写入缓存
+    """
+    cache = get_cache()
+    results = []
+    predicted = predict_images([job[1] for job in jobs])
+    with timed("postprocess"):
+        for (key, _, (dx, dy), rect, size), result in zip(jobs, predicted):
+            result = result.offset(dx, dy, size)
+            if rect is not None:
+                result = result[result.in_rect(rect)]
+            if cache and key:
+                cache.put(key, result)
+            results.append(result)
+    return results
+
+
+def recognize(image: str | bytes | np.ndarray, region: str | tuple | None = None) -> OCRResult:
+    """识别一张图片（路径、编码后的字节或 BGR 数组），region 见 parse_region"""
+    result, job = lookup(image, region)
+    return result if job is None else predict_jobs([job])[0]
+
+
+# ------------------------------------------------------------ 匹配
+
+def find_item(
+    result: OCRResult,
+    target: str,
+    exact: bool = False,
+    region: str | None = None,
+    near: str | None = None,
+    img_size: tuple[int, int] | None = None,
+    fuzzy: float = 0.0,
+) -> dict | None:
+    """
+    在识别结果中查找文字，返回命中的一项，未找到返回 None。
+
+    用 result.text_index 匹配（见 ocr_search），用坐标数组过滤，最后只为选中的一项构造 dict。
+    region 按 img_size（默认 result.size）换算，只保留中心点在区域内的候选；
+    near 时取离参考文字最近的候选；fuzzy 时编辑距离小的优先。
+    """
+    return find_items(result, [target], exact, region, near, img_size, fuzzy)[target]
+
+
+def find_items(
+    result: OCRResult,
+    targets: list[str],
+    exact: bool = False,
+    region: str | None = None,
+    near: str | None = None,
+    img_size: tuple[int, int] | None = None,
+    fuzzy: float = 0.0,
+) -> dict[str, dict | None]:
+    """一次查找多个目标，共用一份索引和区域掩码，返回 {目标: 命中的一项或 None}，参数同 find_item"""
+    with timed("match"):
+        index = result.text_index
+        img_size = img_size or result.size
+        mask = result.in_rect(region_rect(region, img_size)) if region and img_size else None
+        anchor = None
+        if near:
+            anchors = index.search(near, fuzzy=fuzzy)
+            anchor = result.centers[anchors[0]].astype(np.int64) if anchors else None
+
+        found = {}
+        for target, matches in index.search_many(targets, exact=exact, fuzzy=fuzzy).items():
+            candidates = np.array(matches, dtype=np.intp)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if anchor is not None and len(candidates) > 1:
+                d = result.centers[candidates].astype(np.int64) - anchor
+                candidates = candidates[np.argsort((d ** 2).sum(axis=1), kind="stable")]
+            found[target] = result[int(candidates[0])] if len(candidates) else None
+        return found
+
+
+# ------------------------------------------------------------ 文本拼接
+
+def build_text(result: OCRResult, columns: bool = False) -> str:
+    """
+    把识别结果拼成文本：按行聚类，行内按 x 排序，根据间距自动插空格。
+
+    columns=True 时先按贯穿全页的竖直空白把页面切成多栏，逐栏拼接（栏之间空一行），
+    多栏页面的行不会交错在一起。
+    """
+    if not len(result):
+        return ""
+    with timed("build_text"):
+        if not columns:
+            return _build_lines(result)
+        parts = (_build_lines(result.take(index)) for index in _split_columns(result))
+        return "\n\n".join(part for part in parts if part)
+
+
+def _build_lines(result: OCRResult) -> str:
+    n = len(result)
+    x1, x2 = result.bboxes[:, 0], result.bboxes[:, 2]
+    cy = result.centers[:, 1]
+
+    # 行阈值：中位高度 * 0.6
+    heights = result.bboxes[:, 3] - result.bboxes[:, 1]
+    line_thresh = float(np.partition(heights, n // 2)[n // 2]) * 0.6
+
+    # 按 y 聚类成行，行的 y 为行内中心点的均值，增量维护（识别结果通常已按 y 排好序，不再重复排序）
+    order = np.arange(n) if np.all(cy[1:] >= cy[:-1]) else np.argsort(cy, kind="stable")
+    line = np.empty(n, dtype=np.intp)
+    k, total, count = -1, 0, 0
+    for j, y in enumerate(cy[order].tolist()):
+        if count and abs(y - total / count) <= line_thresh:
+            total += y
+            count += 1
+        else:
+            k, total, count = k + 1, y, 1
+        line[j] = k
+
+    # 行内按 x 排序（稳定排序，与逐行 sort 结果相同）
+    by_x = np.lexsort((x1[order], line))
+    order, line = order[by_x], line[by_x]
+
+    # 相邻两块的间距：平均块宽 > 100 时用相对间距，否则用绝对间距
+    gap = x1[order[1:]] - x2[order[:-1]]
+    width = x2[order] - x1[order]
+    avg = (width[1:] + width[:-1]) / 2
+    space = np.where(avg > 100, gap > 0.2 * avg, gap > 30)
+    seps = np.where(line[1:] != line[:-1], "\n", np.where(space, " ", "")).tolist()
+
+    texts = [result.texts[i] for i in order.tolist()]
+    return "".join(chain.from_iterable(zip(texts, seps + [""])))
+
+
+def _split_columns(result: OCRResult) -> list[np.ndarray]:
+    """
+    按竖直空白分栏，返回每栏的下标（保持原顺序）。
+
+    只用不超过文字区域一半宽的框计算空白，跨栏的标题不会挡住栏间空白；
+    空白宽度至少为中位文字高度的 2 倍（且不小于 30px），避免把同一行的词间距当成栏间距。
+    """
+    x1, x2 = result.bboxes[:, 0], result.bboxes[:, 2]
+    left, right = int(x1.min()), int(x2.max())
+    narrow = (x2 - x1) <= (right - left) / 2
+    if not narrow.any():
+        return [np.arange(len(result))]
+
+    # 差分数组求每个 x 被多少个框覆盖
+    cover = np.zeros(right - left + 1, dtype=np.int32)
+    np.add.at(cover, x1[narrow] - left, 1)
+    np.add.at(cover, x2[narrow] - left, -1)
+    empty = np.cumsum(cover) == 0
+    edges = np.flatnonzero(np.diff(np.concatenate([[False], empty, [False]]).astype(np.int8)))
+    starts, ends = edges[::2], edges[1::2]
+
+    heights = result.bboxes[:, 3] - result.bboxes[:, 1]
+    min_gap = max(2 * int(np.median(heights)), 30)
+    wide = (ends - starts >= min_gap) & (starts > 0) & (ends < len(empty))
+    cuts = left + (starts[wide] + ends[wide]) // 2
+    if not len(cuts):
+        return [np.arange(len(result))]
+    column = np.searchsorted(cuts, result.centers[:, 0])
+    return [np.flatnonzero(column == c) for c in range(len(cuts) + 1)]
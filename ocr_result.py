@@ -0,0 +1,322 @@
+"""
+列式识别结果
+
+OCRResult 用几个 NumPy 数组保存一张图片的全部识别结果：
+    texts    list[str]       文字
+    polys    (N, K, 2) int32 文字框多边形顶点 (PaddleOCR 默认 K=4)
+    bboxes   (N, 4) int32    外接矩形 x1, y1, x2, y2
+    centers  (N, 2) int32    中心点
+    scores   (N,) float32    置信度
+
+比每个文字一个 dict（嵌套 tuple / list）省内存、少分配，适合放在缓存和队列里。
+为兼容旧代码，OCRResult 也是一个序列：下标访问和迭代得到与 server JSON 响应相同格式的 dict
+({"text", "box": [[x, y], ...], "bbox": [x1, y1, x2, y2], "center": [x, y], "score"})，
+dict 在访问时才构造；切片、布尔掩码和下标数组则返回新的 OCRResult。
+"""
+from collections.abc import Sequence
+from itertools import chain
+
+import numpy as np
+
+
+def _stack_polys(polys) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    把多边形列表叠成 (N, K, 2) int32 数组。
+
+    顶点数不一致时补齐到最大顶点数（重复最后一个顶点，不影响外接矩形），
+    同时返回每个多边形的实际顶点数；一致时第二项为 None。
+    """
+    if isinstance(polys, np.ndarray) and polys.ndim == 3:
+        return polys.astype(np.int32, copy=False), None
+    lens = list(map(len, polys))
+    if not lens:
+        return np.zeros((0, 4, 2), dtype=np.int32), None
+    n, k = len(lens), max(lens)
+    if min(lens) == k:
+        if isinstance(polys[0], np.ndarray):
+            arr = np.stack(polys)
+        else:
+            # compact 格式的嵌套列表：展平后 fromiter，比 np.asarray 逐层探测嵌套快数倍
+            flat = chain.from_iterable
+            arr = np.fromiter(flat(flat(polys)), dtype=np.float64, count=2 * n * k)
+        return arr.astype(np.int32).reshape(n, k, 2), None
+
+    arr = np.empty((n, k, 2), dtype=np.int32)
+    for i, poly in enumerate(polys):
+        poly = np.asarray(poly).reshape(-1, 2)
+        arr[i, :len(poly)] = poly
+        arr[i, len(poly):] = poly[-1]
+    return arr, np.asarray(lens, dtype=np.int32)
+
+
+class OCRResult(Sequence):
+    """一张图片的识别结果，列式存储"""
+
+    __slots__ = ("texts", "polys", "bboxes", "centers", "scores", "nverts", "size", "_text_index")
+
+    def __init__(
+        self,
+        texts: list[str],
+        polys: np.ndarray,
+        scores: np.ndarray,
+        bboxes: np.ndarray | None = None,
+        centers: np.ndarray | None = None,
+        nverts: np.ndarray | None = None,
+        size: tuple[int, int] | None = None,
+    ):
+        self.texts = list(texts)
+        self.polys = polys
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.nverts = nverts
+        self.size = size
+        self._text_index = None
+        if bboxes is None:
+            bboxes = np.concatenate([polys.min(axis=1), polys.max(axis=1)], axis=1)
+        if centers is None:
+            total = polys.sum(axis=1, dtype=np.int64)
+            if nverts is None:
+                centers = total // 4
+            else:
+                # 去掉补齐用的重复顶点后按实际顶点数取平均
+                total -= polys[:, -1].astype(np.int64) * (polys.shape[1] - nverts)[:, None]
+                centers = total // nverts[:, None]
+        self.bboxes = bboxes.astype(np.int32, copy=False)
+        self.centers = centers.astype(np.int32, copy=False)
+
+    # ------------------------------------------------------------ 构造
+
+    @classmethod
+    def empty(cls, size: tuple[int, int] | None = None) -> "OCRResult":
+        return cls([], np.zeros((0, 4, 2), dtype=np.int32), np.zeros(0, dtype=np.float32), size=size)
+
+    @classmethod
+    def from_predict(cls, res, size: tuple[int, int] | None = None) -> "OCRResult":
+        """从 PaddleOCR predict 的单张结果构造"""
+        if not hasattr(res, "keys"):
+            return cls.empty(size)
+        polys = res.get("rec_polys", res.get("dt_polys", []))
+        texts = res.get("rec_texts", [])
+        scores = res.get("rec_scores", [])
+        n = min(len(polys), len(texts), len(scores))
+        polys, nverts = _stack_polys(polys[:n])
+        return cls(texts[:n], polys, np.asarray(scores[:n]), nverts=nverts, size=size)
+
+    @classmethod
+    def from_raw(cls, raw: dict) -> "OCRResult":
+        """从 JSON 格式 {"rec_texts", "rec_polys", "rec_scores", "size"} 构造（磁盘缓存用）"""
+        size = raw.get("size")
+        return cls.from_predict(raw, tuple(size) if size else None)
+
+    @classmethod
+    def from_items(cls, items, size: tuple[int, int] | None = None) -> "OCRResult":
+        """从 dict 列表（例如 server 的 JSON 响应）构造"""
+        if isinstance(items, OCRResult):
+            return items
+        items = list(items)
+        if not items:
+            return cls.empty(size)
+        polys, nverts = _stack_polys([item["box"] for item in items])
+        return cls(
+            [item["text"] for item in items],
+            polys,
+            np.array([item["score"] for item in items], dtype=np.float32),
+            bboxes=np.array([item["bbox"] for item in items], dtype=np.int32),
+            centers=np.array([item["center"] for item in items], dtype=np.int32),
+            nverts=nverts,
+            size=size,
+        )
+
+    @classmethod
+    def concat(cls, results: list["OCRResult"], size: tuple[int, int] | None = None) -> "OCRResult":
+        results = [r for r in results if len(r)]
+        if not results:
+            return cls.empty(size)
+        k = max(r.polys.shape[1] for r in results)
+        if any(r.nverts is not None or r.polys.shape[1] != k for r in results):
+            parts = [r._as_ragged(k) for r in results]
+            polys = np.concatenate([p for p, _ in parts])
+            nverts = np.concatenate([v for _, v in parts])
+        else:
+            polys, nverts = np.concatenate([r.polys for r in results]), None
+        return cls(
+            list(chain.from_iterable(r.texts for r in results)),
+            polys,
+            np.concatenate([r.scores for r in results]),
+            bboxes=np.concatenate([r.bboxes for r in results]),
+            centers=np.concatenate([r.centers for r in results]),
+            nverts=nverts,
+            size=size,
+        )
+
+    def _as_ragged(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """补齐到 k 个顶点，返回 (polys, nverts)"""
+        nverts = self.nverts if self.nverts is not None else np.full(len(self), self.polys.shape[1], np.int32)
+        if self.polys.shape[1] == k:
+            return self.polys, nverts
+        pad = np.repeat(self.polys[:, -1:], k - self.polys.shape[1], axis=1)
+        return np.concatenate([self.polys, pad], axis=1), nverts
+
+    # ------------------------------------------------------------ 序列接口（兼容 list[dict]）
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            i = range(len(self))[index]
+            return self._items([i])[0]
+        return self.take(index)
+
+    def __iter__(self):
+        return iter(self.to_items())
+
+    def __repr__(self) -> str:
+        preview = ", ".join(repr(t) for t in self.texts[:5])
+        more = ", ..." if len(self) > 5 else ""
+        return f"OCRResult(n={len(self)}, texts=[{preview}{more}])"
+
+    def _items(self, index) -> list[dict]:
+        """为 index 中的各项构造 dict，数组按列一次性 tolist，避免逐个元素转换"""
+        polys = self.polys[index].tolist()
+        if self.nverts is not None:
+            polys = [poly[:n] for poly, n in zip(polys, self.nverts[index].tolist())]
+        bboxes = self.bboxes[index].tolist()
+        centers = self.centers[index].tolist()
+        scores = self.scores[index].tolist()
+        texts = self.texts[index] if isinstance(index, slice) else [self.texts[i] for i in index]
+        return [
+            {
+                "text": text,
+                "box": poly,
+                "bbox": bbox,
+                "center": c,
+                "score": score,
+            }
+            for text, poly, bbox, c, score in zip(texts, polys, bboxes, centers, scores)
+        ]
+
+    def to_items(self) -> list[dict]:
+        """转换为 dict 列表，格式与 server 的 JSON 响应一致"""
+        return self._items(slice(None))
+
+    @property
+    def text_index(self):
+        """文字检索索引 (ocr_search.TextIndex)，首次访问时构建，之后的查询都复用"""
+        if self._text_index is None:
+            from ocr_search import TextIndex
+            self._text_index = TextIndex(self.texts)
+        return self._text_index
+
+    # ------------------------------------------------------------ 列运算
+
+    def take(self, index) -> "OCRResult":
+        """按切片、布尔掩码或下标数组选出子集"""
+        if isinstance(index, slice):
+            texts = self.texts[index]
+        else:
+            index = np.asarray(index)
+            index = np.flatnonzero(index) if index.dtype == bool else index.astype(np.intp)
+            texts = [self.texts[i] for i in index.tolist()]
+        return OCRResult(
+            texts, self.polys[index], self.scores[index],
+            bboxes=self.bboxes[index], centers=self.centers[index],
+            nverts=None if self.nverts is None else self.nverts[index],
+            size=self.size,
+        )
+
+    def offset(self, dx: int, dy: int, size: tuple[int, int] | None = None) -> "OCRResult":
+        """平移全部坐标（裁剪图 -> 原图），size 为平移后所在图片的尺寸"""
+        d = np.array([dx, dy], dtype=np.int32)
+        return OCRResult(
+            self.texts, self.polys + d, self.scores,
+            bboxes=self.bboxes + np.tile(d, 2), centers=self.centers + d,
+            nverts=self.nverts, size=size or self.size,
+        )
+
+    def in_rect(self, rect: tuple[int, int, int, int]) -> np.ndarray:
+        """中心点落在 rect (x1, y1, x2, y2) 内的布尔掩码"""
+        x1, y1, x2, y2 = rect
+        cx, cy = self.centers[:, 0], self.centers[:, 1]
+        return (x1 <= cx) & (cx <= x2) & (y1 <= cy) & (cy <= y2)
+
+    def overlaps(self, rect: tuple[int, int, int, int]) -> np.ndarray:
+        """外接矩形与 rect 相交的布尔掩码"""
+        x1, y1, x2, y2 = rect
+        b = self.bboxes
+        return (b[:, 0] < x2) & (x1 < b[:, 2]) & (b[:, 1] < y2) & (y1 < b[:, 3])
+
+    def sorted(self) -> "OCRResult":
+        """按中心点 (y, x) 排序（稳定排序）"""
+        return self.take(np.lexsort((self.centers[:, 0], self.centers[:, 1])))
+
+    # ------------------------------------------------------------ 序列化
+
+    @property
+    def nbytes(self) -> int:
+        """近似内存占用"""
+        arrays = (self.polys, self.bboxes, self.centers, self.scores)
+        return sum(a.nbytes for a in arrays) + sum(len(t) * 4 + 56 for t in self.texts)
+
+    def to_raw(self) -> dict:
+        """JSON 格式 {"rec_texts", "rec_polys", "rec_scores", "size"}，与 from_raw 互逆"""
+        polys = self.polys.tolist()
+        if self.nverts is not None:
+            polys = [poly[:n] for poly, n in zip(polys, self.nverts.tolist())]
+        return {
+            "rec_texts": self.texts,
+            "rec_polys": polys,
+            "rec_scores": self.scores.tolist(),
+            "size": list(self.size) if self.size else None,
+        }
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        各列的 NumPy 数组，数值列不复制（可直接 np.savez）；
+        texts 转为定长 unicode 数组，这一列会复制。
+        """
+        arrays = {
+            "texts": np.array(self.texts, dtype=str),
+            "polys": self.polys,
+            "bboxes": self.bboxes,
+            "centers": self.centers,
+            "scores": self.scores,
+        }
+        if self.nverts is not None:
+            arrays["nverts"] = self.nverts
+        if self.size:
+            arrays["size"] = np.array(self.size, dtype=np.int32)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "OCRResult":
+        """to_arrays() 的逆操作，也接受 np.load 得到的 NpzFile"""
+        size = arrays["size"].tolist() if "size" in arrays else None
+        return cls(
+            arrays["texts"].tolist(), arrays["polys"], arrays["scores"],
+            bboxes=arrays["bboxes"], centers=arrays["centers"],
+            nverts=arrays["nverts"] if "nverts" in arrays else None,
+            size=tuple(size) if size else None,
+        )
+
+    def to_arrow(self):
+        """
+        转换为 pyarrow.RecordBatch（需要安装 pyarrow）。
+
+        数值列直接引用 NumPy 缓冲区，不复制；polys 为 FixedSizeList<FixedSizeList<int32, 2>, K>，
+        顶点数不一致时另有 nverts 列。
+        """
+        import pyarrow as pa
+
+        n, k = self.polys.shape[:2]
+        polys = np.ascontiguousarray(self.polys)
+        points = pa.FixedSizeListArray.from_arrays(pa.array(polys.reshape(-1)), 2)
+        columns = {
+            "text": pa.array(self.texts, type=pa.string()),
+            "poly": pa.FixedSizeListArray.from_arrays(points, k),
+            "bbox": pa.FixedSizeListArray.from_arrays(pa.array(np.ascontiguousarray(self.bboxes).reshape(-1)), 4),
+            "center": pa.FixedSizeListArray.from_arrays(pa.array(np.ascontiguousarray(self.centers).reshape(-1)), 2),
+            "score": pa.array(self.scores),
+        }
+        if self.nverts is not None:
+            columns["nverts"] = pa.array(self.nverts)
+        return pa.RecordBatch.from_pydict(columns)
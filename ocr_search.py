@@ -0,0 +1,133 @@
+"""
+识别结果的文字检索
+
+TextIndex 对一张图片的全部文字只做一次规范化，fuzzy 查询另建 bigram 倒排索引，
+先按共有的 bigram 数筛出少量候选再算编辑距离。适合一次识别后查找多个按钮
+（OCRResult.text_index 会缓存索引，结果缓存命中时也复用）。
+
+规范化:
+    NFKC        全角转半角、兼容字符统一（ＯＫ → OK，，→ ,）
+    casefold    忽略大小写
+    fuzzy 时再去掉空白，并把 OCR 常混淆的字符 (0/o, 1/l/i/|, 5/s) 视为同一个字符
+
+匹配方式:
+    exact       NFKC 后完全相等（区分大小写）
+    默认        规范化后包含
+    fuzzy       规范化后近似包含：目标与文字中最相近的一段，编辑距离不超过 目标长度 * fuzzy
+"""
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+# OCR 常混淆的字符，casefold 之后映射到同一个字符
+CONFUSABLES = str.maketrans({"0": "o", "1": "l", "i": "l", "|": "l", "5": "s"})
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold，默认匹配和 exact 以外的比较都基于此"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def fold(text: str) -> str:
+    """fuzzy 匹配用的形式：规范化后去掉空白，形近字符统一"""
+    return "".join(normalize(text).split()).translate(CONFUSABLES)
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def substring_distance(pattern: str, text: str) -> int:
+    """pattern 与 text 中最相近的一段子串的编辑距离（子串起止位置不计代价）"""
+    prev = list(range(len(pattern) + 1))
+    best = prev[-1]
+    for ch in text:
+        cur = [0]
+        for i, pc in enumerate(pattern, 1):
+            cur.append(min(prev[i] + 1, cur[i - 1] + 1, prev[i - 1] + (pc != ch)))
+        best = min(best, cur[-1])
+        prev = cur
+    return best
+
+
+class _Postings:
+    """bigram 倒排索引：bigram -> 含有它的文字下标（升序）"""
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        grams = defaultdict(list)
+        for i, text in enumerate(texts):
+            for gram in _bigrams(text):
+                grams[gram].append(i)
+        self.grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in grams.items()}
+
+    def sharing(self, grams: set[str], at_least: int) -> np.ndarray | None:
+        """至少含有 at_least 个 grams 的文字下标；at_least <= 0 时返回 None 表示无法过滤"""
+        if at_least <= 0:
+            return None
+        hits = [self.grams[g] for g in grams if g in self.grams]
+        if not hits:
+            return np.empty(0, np.int32)
+        counts = np.bincount(np.concatenate(hits), minlength=len(self.texts))
+        return np.flatnonzero(counts >= at_least)
+
+
+class TextIndex:
+    """一组文字（一张图片的识别结果）的检索索引，各种形式在首次用到时才构建"""
+
+    def __init__(self, texts: list[str]):
+        self.texts = texts
+        self._exact = None
+        self._normalized = None
+        self._folded = None
+
+    def search(self, target: str, exact: bool = False, fuzzy: float = 0.0) -> list[int]:
+        """
+        返回匹配的文字下标。
+
+        exact 和默认匹配按原顺序（识别结果为阅读顺序）；fuzzy > 0 时按编辑距离从小到大，
+        距离相同的按原顺序。
+        """
+        if exact:
+            return self._exact_map().get(unicodedata.normalize("NFKC", target), [])
+        if fuzzy > 0:
+            return self._search_fuzzy(target, fuzzy)
+
+        if self._normalized is None:
+            self._normalized = [normalize(t) for t in self.texts]
+        target = normalize(target)
+        return [i for i, text in enumerate(self._normalized) if target in text]
+
+    def search_many(self, targets, exact: bool = False, fuzzy: float = 0.0) -> dict[str, list[int]]:
+        """一次查找多个目标，共用同一份索引，返回 {目标: 匹配的下标}"""
+        return {target: self.search(target, exact=exact, fuzzy=fuzzy) for target in dict.fromkeys(targets)}
+
+    def _exact_map(self) -> dict[str, list[int]]:
+        if self._exact is None:
+            self._exact = defaultdict(list)
+            for i, text in enumerate(self.texts):
+                self._exact[unicodedata.normalize("NFKC", text)].append(i)
+        return self._exact
+
+    def _search_fuzzy(self, target: str, fuzzy: float) -> list[int]:
+        if self._folded is None:
+            self._folded = _Postings([fold(t) for t in self.texts])
+        postings = self._folded
+        target = fold(target)
+        if not target:
+            return []
+        max_dist = int(len(target) * fuzzy)
+
+        # q-gram 引理：每处编辑最多破坏 2 个 bigram，距离 <= max_dist 的文字至少共有这么多个
+        grams = _bigrams(target)
+        ids = postings.sharing(grams, len(grams) - 2 * max_dist)
+        candidates = range(len(self.texts)) if ids is None else ids.tolist()
+
+        scored = []
+        for i in candidates:
+            dist = substring_distance(target, postings.texts[i])
+            if dist <= max_dist:
+                scored.append((dist, i))
+        scored.sort()
+        return [i for _, i in scored]
@@ -2,255 +2,637 @@
 OCR Server - FastAPI 服务，预加载模型提供高速 OCR API
 
 启动: uv run uvicorn ocr_server:app --host 0.0.0.0 --port 8089
+本机客户端: uv run python ocr_server.py --uds /tmp/ocr-server.sock
+多进程: uv run python ocr_server.py --processes 4 --pin-cpus（见 ocr_workers.py 和 README 的容量规划）
+指标: GET /metrics（Prometheus 文本格式，见 README）
+就绪: GET /ready，模型加载并预热完成前返回 503（/health 只表示进程存活）
+
+环境变量:
+    OCR_WORKERS      推理线程数，每个线程独占一个模型实例 (默认 1)
+    OCR_QUEUE_SIZE   推理线程全忙时允许排队的请求数，超出直接返回 503 (默认 8)
+    OCR_RETRY_AFTER  503 响应中 Retry-After 的秒数 (默认 1)
+    OCR_BATCH_SIZE   单次 predict 最多合并的图片数 (默认 1，即不合批)
+    OCR_BATCH_WAIT_MS  合批时等待后续请求的最长毫秒数 (默认 10)
+    OCR_WARMUP       启动后用这些分辨率的合成截图预热每个模型实例，逗号分隔，0 关闭 (默认 1280x720,1920x1080)
+    OCR_WARMUP_ROUNDS  预热轮数 (默认 1)
+    OCR_PROCESSES    worker 进程数，每个进程独立加载 OCR_WORKERS 个模型实例 (默认 1，见 --processes)
+    OCR_DEVICE 等推理设备配置见 ocr_engine.py，OCR_CACHE_* 结果缓存配置见 ocr_cache.py
 """
 import os
+import asyncio
 import base64
-import tempfile
+import binascii
+import time
 from pathlib import Path
-from contextlib import asynccontextmanager
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import UploadFile
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
 os.environ["PADDLE_PDX_DISABLE_MODEL_SOURCE_CHECK"] = "True"
 
-from paddleocr import PaddleOCR
+import ocr_engine
+import ocr_workers
+from ocr_cache import get_cache
+from ocr_metrics import CONTENT_TYPE, Counter, Gauge, Histogram, render
+from ocr_result import OCRResult
+
+OCR_WORKERS = max(1, int(os.environ.get("OCR_WORKERS", "1")))
+OCR_QUEUE_SIZE = max(0, int(os.environ.get("OCR_QUEUE_SIZE", "8")))
+OCR_RETRY_AFTER = int(os.environ.get("OCR_RETRY_AFTER", "1"))
+OCR_BATCH_SIZE = max(1, int(os.environ.get("OCR_BATCH_SIZE", "1")))
+OCR_BATCH_WAIT_MS = max(0.0, float(os.environ.get("OCR_BATCH_WAIT_MS", "10")))
+
+
+def parse_resolutions(value: str) -> list[tuple[int, int]]:
+    """解析 "1280x720,1920x1080"，空字符串或 0 表示不预热"""
+    sizes = []
+    for part in value.split(","):
+        part = part.strip().lower()
+        if part and part != "0":
+            w, h = part.split("x")
+            sizes.append((int(w), int(h)))
+    return sizes
+
+
+OCR_WARMUP = parse_resolutions(os.environ.get("OCR_WARMUP", "1280x720,1920x1080"))
+OCR_WARMUP_ROUNDS = max(1, int(os.environ.get("OCR_WARMUP_ROUNDS", "1")))
+
+# 推理专用线程池：predict 是同步阻塞调用，放在事件循环里会卡住 /health 等所有请求
+_executor = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+# 已接收但未完成的推理请求数（运行中 + 排队中），只在事件循环线程内修改
+_pending = 0
+# 就绪状态：warming → ready / failed，由 /ready 返回
+_readiness = {"status": "warming"}
+# 多进程部署时本 worker 的槽位和状态文件，单进程时为 None
+_registry: ocr_workers.WorkerRegistry | None = None
+
+
+# ------------------------------------------------------------ 指标
+
+REQUESTS = Counter("ocr_requests_total", "HTTP 请求数", ["endpoint", "status"])
+REQUEST_SECONDS = Histogram("ocr_request_duration_seconds", "HTTP 请求总耗时", ["endpoint"])
+STAGE_SECONDS = Histogram(
+    "ocr_stage_duration_seconds",
+    "各阶段耗时: queue read cache decode predict predict_cold postprocess build_text match serialize",
+    ["stage"],
+)
+LOOP_LAG_SECONDS = Histogram("ocr_event_loop_lag_seconds", "事件循环调度延迟（定时器实际唤醒比预期晚的时间）")
+BATCH_SIZE = Histogram("ocr_batch_size", "每次 predict 合并的图片数", buckets=(1, 2, 4, 8, 16, 32, 64))
+IMAGE_MEGAPIXELS = Histogram("ocr_image_megapixels", "图片像素数（百万）",
+                             buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32))
+RESULT_BOXES = Histogram("ocr_result_boxes", "每张图片识别出的文字框数",
+                         buckets=(0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000))
+Gauge("ocr_pending_requests", "已接收未完成的推理请求数（运行中 + 排队中）", fn=lambda: _pending)
+Gauge("ocr_queue_depth", "等待合批、尚未交给推理线程的请求数", fn=lambda: _batcher.depth())
+Gauge("ocr_model_instances", "已创建的模型实例数", fn=lambda: ocr_engine.get_pool().stats()["created"])
+Gauge("ocr_model_warm_instances", "已完成过 predict 的模型实例数，小于 instances 时有实例仍是冷的",
+      fn=lambda: ocr_engine.get_pool().stats()["warm"])
+Gauge("ocr_workers", "推理线程数", fn=lambda: OCR_WORKERS)
+Gauge("ocr_ready", "模型加载并预热完成为 1", fn=lambda: int(_readiness["status"] == "ready"))
+Counter("ocr_cache_hits_total", "结果缓存内存命中数", fn=lambda: _cache_stat("hits"))
+Counter("ocr_cache_disk_hits_total", "结果缓存磁盘命中数", fn=lambda: _cache_stat("disk_hits"))
+Counter("ocr_cache_misses_total", "结果缓存未命中数", fn=lambda: _cache_stat("misses"))
+
+ocr_engine.add_stage_hook(lambda stage, seconds: STAGE_SECONDS.observe(seconds, stage=stage))
+
+
+def _cache_stat(name: str) -> int:
+    cache = get_cache()
+    return cache.stats()[name] if cache else 0
+
+
+async def _watch_loop_lag(interval: float = 0.5):
+    """定时 sleep，记录实际唤醒比预期晚多少：事件循环被同步代码卡住时明显变大"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - expected))
+
+
+def _release_slot():
+    global _pending
+    _pending -= 1
+
+
+class PredictBatcher:
+    """
+    动态合批：把并发请求攒成一批，一次 predict 调用。
+
+    有空闲推理线程时取走队列中已有的请求，并最多再等 max_wait_ms 凑满 max_size；
+    推理线程全忙时请求自然在队列里累积，下一批直接取满。
+    """
+
+    def __init__(self, max_size: int, max_wait_ms: float, workers: int):
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self._queue: asyncio.Queue | None = None
+        self._more: asyncio.Event | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._more = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._task = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    async def submit(self, job: tuple):
+        """提交 (load, req, finish) 并等待该请求自己的结果"""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._queue.put_nowait((job, fut, loop.time()))
+        self._more.set()
+        return await fut
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _drain(self, batch: list):
+        while len(batch) < self.max_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            await self._slots.acquire()
+            self._drain(batch)
+            while len(batch) < self.max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._more.clear()
+                try:
+                    await asyncio.wait_for(self._more.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                self._drain(batch)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list):
+        now = asyncio.get_running_loop().time()
+        live = []
+        waits = []
+        for job, fut, queued_at in batch:
+            if fut.cancelled():
+                # 客户端在排队期间断开，不再推理
+                _release_slot()
+            else:
+                STAGE_SECONDS.observe(now - queued_at, stage="queue")
+                live.append((job, fut))
+                waits.append(now - queued_at)
+        if not live:
+            self._slots.release()
+            return
+        BATCH_SIZE.observe(len(live))
+        fut = asyncio.wrap_future(_executor.submit(run_batch, [job for job, _ in live], waits))
+        fut.add_done_callback(lambda f: self._finish(live, f))
+
+    def _finish(self, live: list, done: asyncio.Future):
+        self._slots.release()
+        for _ in live:
+            _release_slot()
+        exc = done.exception()
+        results = [exc] * len(live) if exc else done.result()
+        for (_, fut), result in zip(live, results):
+            if fut.done():
+                continue
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+
+_batcher = PredictBatcher(OCR_BATCH_SIZE, OCR_BATCH_WAIT_MS, OCR_WORKERS)
 
-_ocr = None
+
+def check_capacity():
+    """
+    运行中 + 排队中的请求数超过 OCR_WORKERS + OCR_QUEUE_SIZE 时立即返回 503，
+    避免请求无限堆积、延迟无限增长。
+    """
+    if _pending >= OCR_WORKERS + OCR_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=503,
+            detail="OCR server busy",
+            headers={"Retry-After": str(OCR_RETRY_AFTER)},
+        )
 
 
-def get_ocr():
-    global _ocr
-    if _ocr is None:
-        _ocr = PaddleOCR(
-            use_doc_orientation_classify=False,
-            use_doc_unwarping=False,
-            use_textline_orientation=False,
-            device="gpu",
+async def run_inference(load, req, finish):
+    """
+    提交一次识别：load() 解码图片 → predict（可能与其他请求合批）→ finish(req, img_size, result)。
+
+    超出容量时返回 503，名额在推理真正结束后才释放。
+    """
+    global _pending
+    check_capacity()
+    _pending += 1
+    return await _batcher.submit((load, req, finish))
+
+
+async def warm_up(pool: ocr_engine.ModelPool):
+    """
+    在后台线程预热模型，完成后 /ready 才返回 200。
+
+    第一次 predict 要付 kernel 编译、内存分配、按输入尺寸优化等一次性开销（比正常慢数倍），
+    用常见截图分辨率的合成图片提前跑掉，不让重启后的第一批真实请求承担。
+    """
+    global _readiness
+    if not OCR_WARMUP:
+        _readiness = {"status": "ready", "warmup_ms": 0}
+        return
+    sizes = ", ".join(f"{w}x{h}" for w, h in OCR_WARMUP)
+    print(f"Warming up OCR model x{pool.size} ({sizes}, {OCR_WARMUP_ROUNDS} round(s))...")
+    t0 = time.perf_counter()
+    try:
+        imgs = [ocr_engine.warmup_image(w, h) for w, h in OCR_WARMUP]
+        await asyncio.to_thread(pool.warm_up, imgs, OCR_WARMUP_ROUNDS)
+    except Exception as e:
+        _readiness = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        print(f"OCR warm-up failed: {e!r}")
+        return
+    elapsed = round((time.perf_counter() - t0) * 1000)
+    _readiness = {"status": "ready", "warmup_ms": elapsed}
+    print(f"OCR model ready (warm-up {elapsed}ms)")
+
+
+async def report_status(registry: ocr_workers.WorkerRegistry, interval: float = 2.0):
+    """多进程部署时定期写本 worker 的状态文件（/workers 汇总）"""
+    while True:
+        registry.write_status(
+            status=_readiness["status"],
+            pending=_pending,
+            workers=OCR_WORKERS,
+            cpu_threads=ocr_engine.OCR_CPU_THREADS,
         )
-    return _ocr
+        await asyncio.sleep(interval)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 启动时预加载模型
-    print("Loading OCR model...")
-    get_ocr()
+    global _registry
+    if ocr_workers.OCR_PROCESSES > 1:
+        # 先领槽位、绑核，再加载模型，推理线程继承绑定的 CPU
+        _registry = ocr_workers.WorkerRegistry()
+        _registry.claim()
+        print(f"Worker slot {_registry.slot} (pid {os.getpid()}, cpus {_registry.cpus or 'all'})")
+    # 启动时预加载模型，加载失败直接退出（交给 systemd / uvicorn 重启）
+    print(f"Loading OCR model x{OCR_WORKERS} (device={ocr_engine.OCR_DEVICE})...")
+    pool = ocr_engine.get_pool()
+    pool.size = OCR_WORKERS
+    pool.fill()
     print("OCR model loaded!")
+    _batcher.start()
+    lag_watcher = asyncio.create_task(_watch_loop_lag())
+    reporter = asyncio.create_task(report_status(_registry)) if _registry else None
+    if _registry:
+        # 多个进程共用一个监听 socket，worker 开始 accept 就会分到请求，所以预热完才开始服务，
+        # 其他已就绪的 worker 继续接请求，不会有请求落到冷模型上
+        warmer = None
+        await warm_up(pool)
+    else:
+        # 单进程：预热在后台进行，期间 /health 正常响应，识别请求等预热完成后处理
+        warmer = asyncio.create_task(warm_up(pool))
     yield
+    for task in (warmer, reporter, lag_watcher):
+        if task:
+            task.cancel()
+    await _batcher.stop()
+    _executor.shutdown(wait=False, cancel_futures=True)
+    if _registry:
+        _registry.release()
 
 
 app = FastAPI(title="OCR Server", lifespan=lifespan)
 
 
-class OCRRequest(BaseModel):
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """按路由统计请求数和总耗时，未知路径归为 other，避免标签无限增长"""
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    path = request.url.path
+    endpoint = path if path in _ROUTES else "other"
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint)
+    return response
+
+
+class OCROptions(BaseModel):
+    region: str | None = None  # top/bottom/left/right/center 或 "x1,y1,x2,y2"
+    timings: bool = False  # 响应中附带各阶段耗时 (ms)
+
+    @field_validator("region")
+    @classmethod
+    def _check_region(cls, v):
+        if v is not None:
+            ocr_engine.parse_region(v)
+        return v
+
+
+class OCRTextOptions(OCROptions):
+    text: bool = True  # 拼接 text 字段，只需要 items 时传 false 省掉这一步
+    columns: bool = False  # 多栏页面按栏拼接 text，栏内的行不与其他栏交错
+
+
+class OCRRequest(OCRTextOptions):
     image: str  # base64 encoded image or file path
     is_path: bool = False
 
 
-class FindTextRequest(BaseModel):
-    image: str
-    is_path: bool = False
+class FindOptions(OCROptions):
     target: str
     exact: bool = False
-    region: str | None = None
     near: str | None = None
+    fuzzy: float = Field(0.0, ge=0, lt=1)  # 近似匹配，允许的编辑距离 = 目标长度 * fuzzy
 
 
-def process_image(image: str, is_path: bool) -> str:
-    """处理图片输入，返回文件路径"""
+class FindTextRequest(FindOptions):
+    image: str
+    is_path: bool = False
+
+
+def parse_options(model: type[BaseModel], **kwargs) -> BaseModel:
+    """用查询参数构造选项，校验失败时返回与请求体校验相同格式的 422"""
+    try:
+        return model(**kwargs)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+
+def process_image(image: str, is_path: bool) -> bytes:
+    """处理图片输入，返回图片字节（解码推迟到缓存未命中时）"""
     if is_path:
         if not Path(image).exists():
             raise HTTPException(status_code=400, detail=f"File not found: {image}")
-        return image
+        return Path(image).read_bytes()
     else:
-        # base64 解码并保存到临时文件
-        img_data = base64.b64decode(image)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as f:
-            f.write(img_data)
-            return f.name
-
-
-def recognize_image(img_path: str) -> list[dict]:
-    """识别图片中的文字"""
-    ocr = get_ocr()
-    result = list(ocr.predict(img_path))
-
-    items = []
-    for res in result:
-        if hasattr(res, "keys"):
-            boxes = res.get("rec_polys", res.get("dt_polys", []))
-            txts = res.get("rec_texts", [])
-            scores = res.get("rec_scores", [])
-
-            for box, txt, score in zip(boxes, txts, scores):
-                int_box = [(int(p[0]), int(p[1])) for p in box]
-                cx = sum(p[0] for p in int_box) // 4
-                cy = sum(p[1] for p in int_box) // 4
-                x1 = min(p[0] for p in int_box)
-                y1 = min(p[1] for p in int_box)
-                x2 = max(p[0] for p in int_box)
-                y2 = max(p[1] for p in int_box)
-
-                items.append({
-                    "text": txt,
-                    "box": int_box,
-                    "bbox": [x1, y1, x2, y2],
-                    "center": [cx, cy],
-                    "score": float(score),
-                })
-    items.sort(key=lambda item: (item["center"][1], item["center"][0]))
-    return items
-
-
-def _build_text(items: list[dict]) -> str:
-    """按行聚类，行内按 x 排序，根据间距自动插空格"""
-    if not items:
-        return ""
-
-    # 计算行阈值：中位高度 * 0.6
-    heights = [item["bbox"][3] - item["bbox"][1] for item in items]
-    line_thresh = sorted(heights)[len(heights) // 2] * 0.6
-
-    # 按 y 聚类成行
-    sorted_by_y = sorted(items, key=lambda it: it["center"][1])
-    lines = []
-    current_line = []
-    current_line_y = 0.0
-
-    for item in sorted_by_y:
-        cy = item["center"][1]
-        if not current_line:
-            current_line = [item]
-            current_line_y = cy
-        elif abs(cy - current_line_y) <= line_thresh:
-            current_line.append(item)
-            current_line_y = sum(it["center"][1] for it in current_line) / len(current_line)
+        try:
+            # validate=True：不合法的字符直接报错，而不是被丢弃后得到空字节
+            return base64.b64decode(image, validate=True)
+        except binascii.Error:
+            raise HTTPException(status_code=400, detail="Invalid base64 image")
+
+
+def run_batch(jobs: list[tuple], waits: list[float] | None = None) -> list:
+    """
+    在推理线程中执行一批 (load, req, finish)：
+    逐个读取字节并查缓存 → 未命中的解码（有 region 时裁剪）后一次 predict → 逐个 finish(req, img_size, result)。
+
+    返回与 jobs 一一对应的结果，单个请求出错时对应位置为异常对象，不影响同批其他请求。
+    req.timings 为真的请求在响应中附带各阶段耗时，合批的 predict 计入同批每个请求；
+    waits 为各请求的排队秒数。
+    """
+    results = [None] * len(jobs)
+    timings = [{} if req.timings else None for _, req, _ in jobs]
+    for t, wait in zip(timings, waits or ()):
+        ocr_engine.add_timing("queue", wait * 1000, t)
+    found = {}
+    todo = []
+    for i, (load, req, _) in enumerate(jobs):
+        try:
+            with ocr_engine.collect_timings(timings[i]):
+                region = ocr_engine.search_region(req.region, getattr(req, "near", None))
+                with ocr_engine.timed("read"):
+                    data = load()
+                result, job = ocr_engine.lookup(data, region)
+        except ValueError as e:
+            results[i] = HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            results[i] = e
+        else:
+            if job is None:
+                found[i] = result
+            else:
+                todo.append((i, job))
+
+    try:
+        groups = [_predict_group(todo)] if todo else []
+    except Exception as e:
+        if len(todo) == 1:
+            results[todo[0][0]] = e
+            groups = []
         else:
-            lines.append(current_line)
-            current_line = [item]
-            current_line_y = cy
-    if current_line:
-        lines.append(current_line)
-
-    # 每行处理：按 x 排序，插空格
-    text_lines = []
-    for line_items in lines:
-        line_items.sort(key=lambda it: it["bbox"][0])
-
-        # 拼接，按间距插空格
-        parts = []
-        prev_bbox = None
-        for i, it in enumerate(line_items):
-            if i > 0 and prev_bbox is not None:
-                gap = it["bbox"][0] - prev_bbox[2]
-
-                # 计算平均块宽度和间距比
-                prev_width = prev_bbox[2] - prev_bbox[0]
-                curr_width = it["bbox"][2] - it["bbox"][0]
-                avg_block_width = (prev_width + curr_width) / 2
-
-                # 根据块大小选择不同的判断标准
-                if avg_block_width > 100:
-                    # 大块：用相对间距
-                    should_add_space = gap / avg_block_width > 0.2
-                else:
-                    # 小块：用绝对间距
-                    should_add_space = gap > 30
-
-                if should_add_space:
-                    parts.append(" ")
-            parts.append(it["text"])
-            prev_bbox = it["bbox"]
-        text_lines.append("".join(parts))
-
-    return "\n".join(text_lines)
+            # 同批里有一张图让整批 predict 失败：逐个重试，只有出错的请求失败
+            groups = []
+            for item in todo:
+                try:
+                    groups.append(_predict_group([item]))
+                except Exception as e:
+                    results[item[0]] = e
+    for group, predicted, shared in groups:
+        for (i, _), result in zip(group, predicted):
+            found[i] = result
+            for stage, ms in shared.items():
+                ocr_engine.add_timing(stage, ms, timings[i])
+
+    for i, result in found.items():
+        _, req, finish = jobs[i]
+        if result.size:
+            IMAGE_MEGAPIXELS.observe(result.size[0] * result.size[1] / 1e6)
+        RESULT_BOXES.observe(len(result))
+        try:
+            with ocr_engine.collect_timings(timings[i]):
+                payload = finish(req, result.size, result)
+            if timings[i] is not None:
+                payload["timings"] = {stage: round(ms, 2) for stage, ms in timings[i].items()}
+            results[i] = respond(payload)
+        except Exception as e:
+            results[i] = e
+    return results
+
+
+def _predict_group(todo: list[tuple]) -> tuple[list, list, dict]:
+    """一次 predict 识别 [(序号, job)]，返回 (todo, 结果, 这次 predict 的各阶段耗时)"""
+    with ocr_engine.collect_timings() as shared:
+        predicted = ocr_engine.predict_jobs([job for _, job in todo])
+    return todo, predicted, shared
+
+
+def respond(payload: dict) -> Response:
+    """在推理线程中把响应序列化为 JSON，不占用事件循环；FastAPI 对 Response 不再二次编码"""
+    with ocr_engine.timed("serialize"):
+        return JSONResponse(payload)
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "ready": _readiness["status"] == "ready",
+        "pid": os.getpid(),
+        "slot": _registry.slot if _registry else None,
+        "workers": OCR_WORKERS,
+        "pending": _pending,
+        "batch_size": OCR_BATCH_SIZE,
+        "cache": get_cache().stats() if get_cache() else None,
+    }
+
+
+@app.get("/ready")
+async def ready():
+    """就绪探针：模型加载并预热完成后 200，预热中或预热失败时 503"""
+    code = 200 if _readiness["status"] == "ready" else 503
+    return JSONResponse(_readiness, status_code=code)
+
+
+@app.get("/workers")
+async def workers():
+    """
+    全部 worker 进程的状态（多进程部署时由任意一个 worker 读运行目录汇总）：
+    槽位、pid、绑定的 CPU、就绪状态、在途请求数、状态更新距今秒数、是否存活
+    """
+    if _registry is None:
+        return {"processes": 1, "workers": [{
+            "slot": None, "pid": os.getpid(), "status": _readiness["status"], "pending": _pending,
+            "workers": OCR_WORKERS, "cpu_threads": ocr_engine.OCR_CPU_THREADS, "alive": True,
+        }]}
+    return {"processes": ocr_workers.OCR_PROCESSES, "workers": _registry.read_all()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 文本格式的指标"""
+    return Response(render(), media_type=CONTENT_TYPE)
+
+
+def ocr_finish(req: OCRTextOptions, img_size: tuple[int, int], result: OCRResult) -> dict:
+    """/ocr 后处理（在推理线程中执行），结果已按阅读顺序排好"""
+    response = {"ok": True, "items": result.to_items()}
+    if req.text:
+        response["text"] = ocr_engine.build_text(result, columns=req.columns)
+    response["size"] = list(img_size)
+    return response
+
+
+def find_text_finish(req: FindOptions, img_size: tuple[int, int], result: OCRResult) -> dict:
+    """/find 后处理（在推理线程中执行），img_size 用于 region 计算；只为命中的一项构造 dict"""
+    item = ocr_engine.find_item(
+        result, req.target, exact=req.exact, region=req.region, near=req.near, img_size=img_size,
+        fuzzy=req.fuzzy,
+    )
+    if item is None:
+        return {"ok": False, "error": "not_found", "texts": result.texts}
+    return {"ok": True, "item": item}
+
+
+async def read_upload(request: Request) -> bytes:
+    """读取上传的图片字节：application/octet-stream 请求体，或 multipart/form-data 的第一个文件"""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        for value in form.values():
+            if isinstance(value, UploadFile):
+                return await value.read()
+        raise HTTPException(status_code=400, detail="No file in multipart body")
+    data = await request.body()
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty request body")
+    return data
 
 
 @app.post("/ocr")
 async def ocr(req: OCRRequest):
     """识别图片中的所有文字"""
-    img_path = process_image(req.image, req.is_path)
-    try:
-        items = recognize_image(img_path)
-        text = _build_text(items)
-        return {"ok": True, "items": items, "text": text}
-    finally:
-        if not req.is_path:
-            Path(img_path).unlink(missing_ok=True)
+    return await run_inference(partial(process_image, req.image, req.is_path), req, ocr_finish)
 
 
 @app.post("/find")
 async def find_text(req: FindTextRequest):
     """查找指定文字"""
-    img_path = process_image(req.image, req.is_path)
-    try:
-        items = recognize_image(img_path)
-
-        # 获取图片尺寸用于 region 计算
-        img_size = None
-        if req.region:
-            from PIL import Image
-            with Image.open(img_path) as img:
-                img_size = img.size
-
-        # 如果有 near 参数，先找到参考文字的位置
-        near_center = None
-        if req.near:
-            for item in items:
-                if req.near.lower() in item["text"].lower():
-                    near_center = item["center"]
-                    break
-
-        # 过滤和匹配
-        candidates = []
-        for item in items:
-            if req.exact:
-                if item["text"] != req.target:
-                    continue
-            else:
-                if req.target.lower() not in item["text"].lower():
-                    continue
-
-            if req.region and img_size:
-                cx, cy = item["center"]
-                w, h = img_size
-                if req.region == "top" and cy > h * 0.4:
-                    continue
-                elif req.region == "bottom" and cy < h * 0.6:
-                    continue
-                elif req.region == "left" and cx > w * 0.4:
-                    continue
-                elif req.region == "right" and cx < w * 0.6:
-                    continue
-                elif req.region == "center":
-                    if not (w * 0.3 < cx < w * 0.7 and h * 0.3 < cy < h * 0.7):
-                        continue
-
-            candidates.append(item)
-
-        if not candidates:
-            return {"ok": False, "error": "not_found", "texts": [i["text"] for i in items]}
-
-        # 如果有 near 参数，返回最近的候选
-        if near_center and len(candidates) > 1:
-            def distance(item):
-                cx, cy = item["center"]
-                nx, ny = near_center
-                return (cx - nx) ** 2 + (cy - ny) ** 2
-            candidates.sort(key=distance)
-
-        return {"ok": True, "item": candidates[0]}
-    finally:
-        if not req.is_path:
-            Path(img_path).unlink(missing_ok=True)
+    return await run_inference(partial(process_image, req.image, req.is_path), req, find_text_finish)
+
+
+@app.post("/ocr/upload")
+async def ocr_upload(
+    request: Request,
+    region: str | None = None,
+    text: bool = True,
+    columns: bool = False,
+    timings: bool = False,
+):
+    """识别上传的图片（原始字节或 multipart 文件，省去 base64 编解码），选项同 /ocr，通过查询参数传递"""
+    check_capacity()
+    data = await read_upload(request)
+    req = parse_options(OCRTextOptions, region=region, text=text, columns=columns, timings=timings)
+    return await run_inference(lambda: data, req, ocr_finish)
+
+
+@app.post("/find/upload")
+async def find_text_upload(
+    request: Request,
+    target: str,
+    exact: bool = False,
+    region: str | None = None,
+    near: str | None = None,
+    fuzzy: float = 0.0,
+    timings: bool = False,
+):
+    """在上传的图片中查找指定文字，选项通过查询参数传递"""
+    check_capacity()
+    data = await read_upload(request)
+    req = parse_options(
+        FindOptions, target=target, exact=exact, region=region, near=near, fuzzy=fuzzy, timings=timings,
+    )
+    return await run_inference(lambda: data, req, find_text_finish)
+
+
+_ROUTES = {route.path for route in app.routes}
 
 
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8089)
+
+    parser = argparse.ArgumentParser(description="OCR Server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--uds", metavar="PATH",
+                        help="监听 Unix socket 而不是 TCP (ocr.py 默认探测 /tmp/ocr-server.sock)")
+    parser.add_argument("--processes", type=int, default=ocr_workers.OCR_PROCESSES, metavar="N",
+                        help="worker 进程数，共用一个端口，每个进程独立加载模型 (默认: $OCR_PROCESSES 或 1)")
+    parser.add_argument("--pin-cpus", action="store_true",
+                        help="多进程时把每个 worker 绑定到互不重叠的一组 CPU (等价于 OCR_PIN_CPUS=1)")
+    ocr_engine.add_device_arguments(parser)
+    args = parser.parse_args()
+    ocr_engine.configure_from_args(args)
+    listen = {"uds": args.uds} if args.uds else {"host": args.host, "port": args.port}
+
+    if args.processes <= 1:
+        uvicorn.run(app, **listen)
+    else:
+        import shutil
+        import tempfile
+
+        # 未指定 CPU 推理线程数时按进程数平分 CPU，避免 N 个进程各开满线程互相抢占
+        if ocr_engine.OCR_CPU_THREADS <= 0:
+            ocr_engine.configure(cpu_threads=ocr_workers.thread_budget(args.processes, OCR_WORKERS))
+        run_dir = tempfile.mkdtemp(prefix="ocr-server-")
+        # worker 进程重新 import 本模块，配置都通过环境变量传过去
+        os.environ.update(
+            ocr_engine.device_env(),
+            OCR_PROCESSES=str(args.processes),
+            OCR_RUN_DIR=run_dir,
+            OCR_PIN_CPUS="1" if args.pin_cpus or ocr_workers.OCR_PIN_CPUS else "0",
+        )
+        # numpy / OpenCV 等的 OpenMP 线程池也限制在同样的预算内
+        os.environ.setdefault("OMP_NUM_THREADS", str(ocr_engine.OCR_CPU_THREADS))
+        try:
+            uvicorn.run("ocr_server:app", workers=args.processes, **listen)
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
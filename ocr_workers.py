@@ -0,0 +1,138 @@
+"""
+多进程部署：python ocr_server.py --processes N 起 N 个 uvicorn worker 进程共用一个端口，
+每个进程独立加载模型、互不共享状态。本模块只负责进程之间必需的一点协调，全部通过运行目录里的文件完成:
+
+- 槽位：worker 启动时用文件锁领取 0..N-1 中空闲的编号，进程退出时锁自动释放，替换它的 worker 接手这个编号
+  （uvicorn 总是先回收旧 worker 再启动替换它的进程，不会出现 N 个以上 worker 同时存活）
+- 绑核：OCR_PIN_CPUS=1 时按槽位把 worker 的全部线程绑定到互不重叠的一组 CPU，避免 N 个进程的推理线程互相抢占
+- 状态：每个 worker 定期把自己的状态写到 worker-<槽位>.json，任何一个 worker 都能汇总全部 worker 的健康状况
+
+环境变量（由 ocr_server.py --processes 设置，一般不用手动指定）:
+    OCR_PROCESSES   worker 进程数
+    OCR_RUN_DIR     运行目录（槽位锁和状态文件）
+    OCR_PIN_CPUS    是否绑核 (默认 0)
+"""
+import fcntl
+import json
+import os
+import time
+from pathlib import Path
+
+OCR_PROCESSES = max(1, int(os.environ.get("OCR_PROCESSES", "1")))
+OCR_RUN_DIR = os.environ.get("OCR_RUN_DIR") or f"/tmp/ocr-server-{os.getppid()}"
+OCR_PIN_CPUS = os.environ.get("OCR_PIN_CPUS", "0").lower() in ("1", "true", "yes")
+
+# 状态文件超过这么多秒没有更新，视为 worker 已卡死
+STALE_AFTER = 10.0
+
+
+def available_cpus() -> list[int]:
+    """本进程可用的 CPU（遵守 taskset / cgroup cpuset），不支持时按 cpu_count 编号"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_groups(processes: int, cpus: list[int] | None = None) -> list[list[int]]:
+    """把可用 CPU 平均切成 processes 组（CPU 比进程少时每组至少一个，允许重叠）"""
+    cpus = cpus or available_cpus()
+    if len(cpus) < processes:
+        return [[cpus[i % len(cpus)]] for i in range(processes)]
+    size = len(cpus) // processes
+    return [cpus[i * size:(i + 1) * size] for i in range(processes)]
+
+
+def thread_budget(processes: int, workers: int) -> int:
+    """每个模型实例的 CPU 推理线程数：可用 CPU 平均分给 processes * workers 个实例"""
+    return max(1, len(available_cpus()) // (processes * workers))
+
+
+def _pin_all_threads(cpus: list[int]):
+    """绑定本进程全部已有线程（sched_setaffinity 只作用于单个线程），之后新建的线程继承"""
+    for tid in os.listdir("/proc/self/task"):
+        try:
+            os.sched_setaffinity(int(tid), cpus)
+        except (OSError, ValueError):
+            pass
+
+
+class WorkerRegistry:
+    """当前 worker 在运行目录中的槽位、绑核和状态文件"""
+
+    def __init__(self, run_dir: str = OCR_RUN_DIR, processes: int = OCR_PROCESSES, pin: bool = OCR_PIN_CPUS):
+        self.run_dir = Path(run_dir)
+        self.processes = processes
+        self.pin = pin and hasattr(os, "sched_setaffinity")
+        self.slot: int | None = None
+        self.cpus: list[int] | None = None
+        self.started = time.time()
+        self._lock_file = None
+
+    def claim(self) -> int:
+        """领取最小的空闲槽位并按槽位绑核"""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        for slot in range(self.processes):
+            if self._try_lock(slot):
+                self._apply_pin()
+                return slot
+        raise RuntimeError(f"no free worker slot in {self.run_dir} ({self.processes} processes)")
+
+    def _try_lock(self, slot: int) -> bool:
+        f = open(self.run_dir / f"slot-{slot}.lock", "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self.slot, self._lock_file = slot, f
+        return True
+
+    def _apply_pin(self):
+        if not self.pin:
+            return
+        self.cpus = cpu_groups(self.processes)[self.slot]
+        _pin_all_threads(self.cpus)
+
+    def _status_path(self, slot: int) -> Path:
+        return self.run_dir / f"worker-{slot}.json"
+
+    def write_status(self, **status):
+        """原子地写入本 worker 的状态（先写临时文件再 rename，读者不会读到半个文件）"""
+        record = {"slot": self.slot, "pid": os.getpid(), "cpus": self.cpus, "started": self.started,
+                  "updated": time.time(), **status}
+        path = self._status_path(self.slot)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        tmp.write_text(json.dumps(record))
+        os.replace(tmp, path)
+
+    def release(self):
+        """正常退出时删除状态文件、释放槽位"""
+        if self.slot is None:
+            return
+        self._status_path(self.slot).unlink(missing_ok=True)
+        self._lock_file.close()
+        self.slot = None
+
+    def read_all(self) -> list[dict]:
+        """全部 worker 的状态，附带 alive（进程存在且状态在 STALE_AFTER 秒内更新过）"""
+        now = time.time()
+        workers = []
+        for path in sorted(self.run_dir.glob("worker-*.json")):
+            try:
+                record = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            record["age"] = round(now - record["updated"], 1)
+            record["alive"] = _pid_alive(record["pid"]) and record["age"] < STALE_AFTER
+            workers.append(record)
+        return workers
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,42 @@
+"""recognize_many 的故障隔离：合批 predict 里一张图出错时，同批其他图片照常返回结果"""
+import cv2
+import numpy as np
+import pytest
+
+import ocr
+import ocr_engine
+from ocr_result import OCRResult
+
+
+@pytest.fixture
+def predict_calls(monkeypatch):
+    """本地模式、不开缓存，predict 遇到全黑图片时整批抛异常"""
+    calls = []
+
+    def predict_images(imgs):
+        calls.append(len(imgs))
+        if any(img.max() == 0 for img in imgs):
+            raise RuntimeError("poisoned image")
+        return [OCRResult.empty((img.shape[1], img.shape[0])) for img in imgs]
+
+    monkeypatch.setattr(ocr, "_check_server", lambda: False)
+    monkeypatch.setattr(ocr_engine, "get_cache", lambda: None)
+    monkeypatch.setattr(ocr_engine, "predict_images", predict_images)
+    return calls
+
+
+def write_png(path, value: int) -> str:
+    cv2.imwrite(str(path), np.full((32, 48, 3), value, np.uint8))
+    return str(path)
+
+
+def test_poisoned_image_fails_alone(tmp_path, predict_calls):
+    paths = [write_png(tmp_path / f"{i}.png", value) for i, value in enumerate([255, 0, 200, 128])]
+
+    results = list(ocr.recognize_many(paths, batch_size=4, workers=2))
+
+    assert [path for path, _, _ in results] == paths
+    assert [error is None for _, _, error in results] == [True, False, True, True]
+    assert isinstance(results[1][2], RuntimeError)
+    assert all(items is not None for _, items, error in results if error is None)
+    assert predict_calls == [4, 1, 1, 1, 1]  # 整批失败后逐张重试
@@ -0,0 +1,75 @@
+"""run_batch 的故障隔离：同批里一张图让 predict 出错时，只有它自己的请求失败"""
+import base64
+from functools import partial
+
+import cv2
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+import ocr_engine
+import ocr_server
+from ocr_cache import OCRCache
+from ocr_result import OCRResult
+
+
+def png(value: int) -> bytes:
+    return cv2.imencode(".png", np.full((32, 48, 3), value, np.uint8))[1].tobytes()
+
+
+GOOD, CACHED, POISON = png(255), png(200), png(0)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """带内存缓存的 engine，predict 遇到全黑图片时整批抛异常"""
+    cache = OCRCache(16, 1 << 20)
+    calls = []
+
+    def predict_images(imgs):
+        calls.append(len(imgs))
+        if any(img.max() == 0 for img in imgs):
+            raise RuntimeError("poisoned image")
+        return [OCRResult.empty((img.shape[1], img.shape[0])) for img in imgs]
+
+    monkeypatch.setattr(ocr_engine, "get_cache", lambda: cache)
+    monkeypatch.setattr(ocr_engine, "predict_images", predict_images)
+    return calls
+
+
+def job(data: bytes):
+    return (lambda: data), ocr_server.OCRTextOptions(), ocr_server.ocr_finish
+
+
+def test_poisoned_job_fails_alone(engine):
+    ocr_engine.recognize(CACHED)
+    engine.clear()
+
+    results = ocr_server.run_batch([job(CACHED), job(POISON), job(GOOD)])
+
+    assert results[0].status_code == 200  # 缓存命中，不经过 predict
+    assert isinstance(results[1], RuntimeError)
+    assert results[2].status_code == 200
+    assert engine == [2, 1, 1]  # 整批失败后逐个重试
+
+
+def test_single_poisoned_job_not_retried(engine):
+    results = ocr_server.run_batch([job(POISON)])
+
+    assert isinstance(results[0], RuntimeError)
+    assert engine == [1]
+
+
+@pytest.mark.parametrize("image", ["!!!", "", base64.b64encode(b"not an image").decode()])
+def test_invalid_payload_is_400(engine, image):
+    load = partial(ocr_server.process_image, image, False)
+    results = ocr_server.run_batch([(load, ocr_server.OCRTextOptions(), ocr_server.ocr_finish)])
+
+    assert isinstance(results[0], HTTPException)
+    assert results[0].status_code == 400
+    assert engine == []
+
+
+def test_decode_empty_buffer():
+    with pytest.raises(ValueError, match="Invalid image data"):
+        ocr_engine.decode_image(b"")